@@ -1,6 +1,10 @@
 import os
+import time
+import importlib
+import tempfile
+import threading
+_MULAI_SKRIP = time.perf_counter()
 import pandas as pd
-import matplotlib.pyplot as plt
 import streamlit as st
 
 # ====== PAGE CONFIG MUST BE FIRST ======
@@ -10,12 +14,16 @@ st.set_page_config(
 )
 
 # ====== IMPORT SESUAI STRUKTUR REPO (paket utils) ======
-from utils.model_utils import train_and_predict, single_predict, FTR, preprocess_df
+# Hanya modul ringan di sini; sklearn (model_utils/batch_utils), matplotlib
+# (chart_utils) dan fpdf (pdf_utils) diimpor di dalam menu yang memakainya
+from utils.train_worker import model_untuk_prediksi, ajukan_latih, tunggu_job, job_berjalan
 from utils.db_utils import (
-    init_db, simpan_data_siswa, simpan_data_batch,
-    ambil_semua_data, backup_db, kosongkan_database
+    init_db, simpan_data_siswa, fingerprint_data,
+    buat_backup, daftar_backup, BACKUP_KEEP, kosongkan_database,
+    jumlah_data, ambil_data_halaman, hitung_potensi_prediksi, hitung_potensi_asli,
+    hitung_per_sumber, hitung_confusion, daftar_partisi, bangun_ulang_ringkasan_confusion
 )
-from utils.pdf_utils import generate_pdf_report, map_columns
+from utils.perf_utils import catat, ukur_tahap, ringkasan_tahap, reset_catatan, log_aktif
 
 # ========== SETTING KUNCI ==========
 KUNCI_UTAMA = "admin2025"
@@ -25,12 +33,51 @@ if "akses" not in st.session_state:
     st.session_state.akses = None
 
 # ========== MENU AKSES ==========
-MENU_ALL = ["Siswa Individu", "Batch Simulasi", "Data & Visualisasi", "Database"]
+MENU_ALL = ["Siswa Individu", "Batch Simulasi", "Data & Visualisasi", "Database", "Performa"]
 MENU_LIMITED = ["Siswa Individu", "Batch Simulasi", "Data & Visualisasi"]
 MENU_SINGLE = ["Siswa Individu"]
 
-# Inisialisasi DB paling awal
-init_db()
+UKURAN_HALAMAN = 500  # baris per halaman tabel Data & Visualisasi
+BATCH_PDF_MAX = 2000  # batas jumlah siswa untuk laporan PDF batch
+LAPORAN_ZIP_MAX = 500   # batas jumlah siswa untuk ZIP laporan per siswa
+LAPORAN_ZIP_KB = 100    # perkiraan ukuran satu PDF per siswa (logo diperkecil)
+
+@st.cache_resource
+def siapkan_database():
+    """init_db sekali per proses server, bukan di setiap rerun."""
+    with ukur_tahap("app.init_db"):
+        init_db()
+    return True
+
+@st.cache_resource
+def pemanasan():
+    """
+    Sekali per proses server, di thread latar: impor modul berat lalu isi cache
+    bersama (model terbaru, logo PNG, metrik font) agar tidak dibayar request pertama.
+    """
+    def jalankan():
+        with ukur_tahap("app.pemanasan"):
+            with ukur_tahap("app.impor.model_utils"):
+                from utils.model_utils import muat_model, muat_model_terbaru
+            with ukur_tahap("app.muat_model"):
+                # model untuk data saat ini bila sudah ada di registry, selain itu yang terbaru
+                muat_model(fingerprint_data()) or muat_model_terbaru()
+            with ukur_tahap("app.impor.pdf_utils"):
+                from utils.pdf_utils import pemanasan_pdf
+            pemanasan_pdf()
+            for modul in ("utils.chart_utils", "utils.batch_utils"):
+                with ukur_tahap(f"app.impor.{modul.split('.')[-1]}"):
+                    importlib.import_module(modul)
+
+    thread = threading.Thread(target=jalankan, name="pemanasan", daemon=True)
+    thread.start()
+    return thread
+
+# Inisialisasi DB paling awal (sekali per proses)
+siapkan_database()
+pemanasan()
+# Waktu impor + inisialisasi skrip: run pertama = cold start, berikutnya = rerun
+catat("app.mulai", time.perf_counter() - _MULAI_SKRIP)
 
 # ========== SIDEBAR KUNCI ==========
 with st.sidebar:
@@ -80,6 +127,11 @@ st.write(
 )
 
 mode = st.sidebar.radio("Pilih Menu:", menu_options, key="menu")
+mulai_mode = time.perf_counter()
+
+def catat_mode():
+    """Catat durasi handler menu aktif (tahap app.<menu>) ke panel Performa."""
+    catat(f"app.{mode}", time.perf_counter() - mulai_mode)
 
 @st.cache_data
 def load_sample():
@@ -91,9 +143,32 @@ def load_sample():
         st.info("Contoh data tidak ditemukan (data/data_siswa_smp.csv). Silakan lanjutkan tanpa contoh.")
         return pd.DataFrame()
 
+def siapkan_model():
+    """
+    Model siap pakai tanpa menunggu retrain; hanya menunggu bila belum ada model sama sekali.
+    Bila tidak ada model, pesan kesalahan ditampilkan (st.error) dan None dikembalikan.
+    """
+    model, job_id = model_untuk_prediksi()
+    galat = None
+    if model is None and job_id is not None:
+        with st.spinner("Model pertama sedang dilatih..."):
+            model, galat = tunggu_job(job_id)
+    if galat is not None:
+        st.error(f"Pelatihan model gagal: {galat}")
+    elif model is None:
+        st.error("Data latih tidak tersedia. Harap upload data batch dengan label potensi terlebih dahulu.")
+    return model
+
+@st.fragment(run_every=2)
+def status_latih():
+    job = job_berjalan()
+    if job is not None:
+        st.progress(job['progress'], text=f"Model baru sedang dilatih di latar belakang: {job['pesan']}")
+
 # ========== MODE 1: SISWA INDIVIDU ==========
 if mode == "Siswa Individu":
     st.subheader("Input Data Siswa Individu")
+    status_latih()
     with st.form("form_siswa"):
         nama = st.text_input("Nama Siswa")
         jenis_kelamin = st.radio("Jenis Kelamin", options=["L", "P"], index=None)
@@ -121,30 +196,12 @@ if mode == "Siswa Individu":
                 nilai_bindo is None or nilai_bing is None or nilai_tik is None or potensi == ""):
                 st.error("Semua kolom termasuk Potensi wajib diisi dengan benar!")
             else:
-                # siapkan data latih
-                df_all = ambil_semua_data()
-                df_train = df_all[
-                    df_all['potensi_asli'].notnull() &
-                    (df_all['potensi_asli'] != "") &
-                    (df_all['potensi_asli'] != "-")
-                ] if not df_all.empty and 'potensi_asli' in df_all.columns else pd.DataFrame()
-                if df_train.empty:
-                    try:
-                        df_train = pd.read_csv('data/data_siswa_smp.csv')
-                        if "Potensi" in df_train.columns:
-                            df_train = df_train[
-                                df_train['Potensi'].notnull() &
-                                (df_train['Potensi'] != "") &
-                                (df_train['Potensi'] != "-")
-                            ]
-                            df_train.rename(columns={"Potensi": "potensi_asli"}, inplace=True)
-                    except Exception:
-                        df_train = pd.DataFrame()
-
-                if df_train.empty:
-                    st.error("Data latih tidak tersedia. Harap upload data batch dengan label potensi terlebih dahulu.")
-                else:
-                    hasil_df, acc, label_encoder, mlp, scaler = train_and_predict(df_train.copy())
+                from utils.model_utils import single_predict
+                from utils.pdf_utils import generate_pdf_report, nama_file_laporan, map_columns
+
+                # model terakhir yang siap; latih ulang berjalan di worker latar
+                model = siapkan_model()
+                if model is not None:
                     input_dict = {
                         'Jenis_Kelamin_enc': 1 if jenis_kelamin == "L" else 0,
                         'usia': usia,
@@ -159,7 +216,7 @@ if mode == "Siswa Individu":
                         'minat_sosial': minat_sosial,
                         'minat_teknologi': minat_teknologi
                     }
-                    hasil_pred = single_predict(input_dict, mlp, scaler, label_encoder)
+                    hasil_pred = single_predict(input_dict, model)
 
                     st.session_state['hasil_prediksi_siswa'] = {
                         "nama": nama,
@@ -180,54 +237,58 @@ if mode == "Siswa Individu":
                         "sumber": "individu",
                     }
 
-                    simpan_data_siswa(st.session_state['hasil_prediksi_siswa'])
+                    laporan_simpan = simpan_data_siswa(st.session_state['hasil_prediksi_siswa'])
+                    if laporan_simpan['baru'] or laporan_simpan['diperbarui']:
+                        ajukan_latih()
+                    else:
+                        st.info("Data siswa ini sudah ada di database; tidak disimpan ulang.")
                     st.success(f"Prediksi Potensi Akademik Siswa: **{hasil_pred}** (Potensi: {potensi})")
 
                     hasil_output = pd.DataFrame([st.session_state['hasil_prediksi_siswa']])
                     hasil_output_out = map_columns(hasil_output)
-                    pdf_file = generate_pdf_report(hasil_output_out, f"Laporan Prediksi Siswa - {nama}")
-                    st.session_state['pdf_file_siswa'] = pdf_file
+                    judul_pdf = f"Laporan Prediksi Siswa - {nama}"
+                    st.session_state['pdf_file_siswa'] = generate_pdf_report(hasil_output_out, judul_pdf)
+                    st.session_state['pdf_nama_siswa'] = nama_file_laporan(judul_pdf)
 
     if 'hasil_prediksi_siswa' in st.session_state:
+        from utils.kolom_utils import map_columns
+        from utils.chart_utils import chart_pie
+
         hasil_df = pd.DataFrame([st.session_state['hasil_prediksi_siswa']])
         hasil_df_out = map_columns(hasil_df)
         st.markdown("#### Preview Hasil Simulasi")
         st.dataframe(hasil_df_out)
 
-        df_db = ambil_semua_data()
-        df_all = pd.concat([df_db, hasil_df], ignore_index=True)
-        df_all_out = map_columns(df_all)
+        # Hitungan dari DB (data siswa ini sudah tersimpan); chart di-cache per nilai hitungan
+        count_prediksi = hitung_potensi_prediksi()
 
         st.markdown("#### Distribusi Potensi Prediksi")
         col_chart, _ = st.columns([1, 2])
         with col_chart:
-            fig, ax = plt.subplots(figsize=(3.5, 3.5))
-            if 'Potensi Prediksi' in df_all_out.columns and not df_all_out.empty:
-                df_all_out['Potensi Prediksi'].value_counts().plot.pie(
-                    autopct='%1.0f%%', ax=ax, textprops={'fontsize': 9}
-                )
-                ax.set_ylabel("")
-                ax.set_title("Distribusi Potensi Prediksi", fontsize=11)
-                st.pyplot(fig)
+            if not count_prediksi.empty:
+                st.image(chart_pie(
+                    count_prediksi, "Distribusi Potensi Prediksi",
+                    ukuran=3.5, fontsize=9, judul_size=11, startangle=0
+                ))
 
     if 'pdf_file_siswa' in st.session_state:
-        with open(st.session_state['pdf_file_siswa'], "rb") as f:
-            st.download_button(
-                "Download Laporan PDF",
-                f,
-                file_name=os.path.basename(st.session_state['pdf_file_siswa']),
-                mime="application/pdf"
-            )
-        try:
-            os.remove(st.session_state['pdf_file_siswa'])
-        except Exception:
-            pass
+        st.download_button(
+            "Download Laporan PDF",
+            st.session_state['pdf_file_siswa'],
+            file_name=st.session_state['pdf_nama_siswa'],
+            mime="application/pdf"
+        )
         del st.session_state['pdf_file_siswa']
+        del st.session_state['pdf_nama_siswa']
         del st.session_state['hasil_prediksi_siswa']
 
 # ========== MODE 2: BATCH SIMULASI ==========
 if mode == "Batch Simulasi":
     st.subheader("Batch Simulasi: Upload File CSV Data Siswa")
+    status_latih()
+    from utils.batch_utils import proses_batch_csv, PREVIEW_ROWS
+    from utils.pdf_utils import generate_pdf_report, generate_zip_laporan_siswa, nama_file_laporan, map_columns
+
     st.info(
         "Upload file CSV berisi data siswa. Format kolom: Nama, Jenis Kelamin, Usia, Nilai Matematika, Nilai IPA, Nilai IPS, "
         "Nilai Bahasa Indonesia, Nilai Bahasa Inggris, Nilai TIK, Minat Sains, "
@@ -241,151 +302,167 @@ if mode == "Batch Simulasi":
     uploaded_file = st.file_uploader("Upload file .csv", type=["csv"])
 
     if uploaded_file:
-        df = pd.read_csv(uploaded_file)
+        # Preview hanya beberapa baris pertama; isi file diproses per chunk
+        df_preview = pd.read_csv(uploaded_file, nrows=PREVIEW_ROWS)
+        uploaded_file.seek(0)
         st.write("Preview Data Siswa yang Diupload:")
-        st.dataframe(map_columns(df))
+        st.dataframe(map_columns(df_preview))
 
+        buat_zip = st.checkbox(
+            f"Buat juga laporan PDF per siswa (ZIP, maksimal {LAPORAN_ZIP_MAX} siswa, "
+            f"±{LAPORAN_ZIP_KB} KB per siswa / ±{LAPORAN_ZIP_MAX * LAPORAN_ZIP_KB // 1000} MB)", value=False
+        )
         if st.button("Simulasi Batch"):
-            df.columns = [c.strip() for c in df.columns]
-            df.rename(columns={
-                "Nilai Matematika": "nilai_mtk", "Nilai IPA": "nilai_ipa", "Nilai IPS": "nilai_ips",
-                "Nilai Bahasa Indonesia": "nilai_bindo", "Nilai Bahasa Inggris": "nilai_bing", "Nilai TIK": "nilai_tik",
-                "Minat Sains": "minat_sains", "Minat Bahasa": "minat_bahasa",
-                "Minat Sosial": "minat_sosial", "Minat Teknologi": "minat_teknologi",
-                "Jenis Kelamin": "jenis_kelamin", "Usia": "usia", "Potensi": "potensi_asli", "Nama": "nama"
-            }, inplace=True)
-
-            if 'nama' in df.columns:
-                df = df[df['nama'].astype(str).str.strip().str.lower() != "-"]
-                df = df[df['nama'].astype(str).str.strip() != ""]
-            df = preprocess_df(df)
-
-            df_all = ambil_semua_data()
-            if df_all.empty:
-                df_all = df.copy()
-            else:
-                df_all = pd.concat([df_all, df], ignore_index=True)
-
-            hasil_df, acc, label_encoder, mlp, scaler = train_and_predict(df_all.copy())
-            X_upload = df[FTR]
-            X_upload_scaled = scaler.transform(X_upload)
-            y_upload_pred = mlp.predict(X_upload_scaled)
-            prediksi_label = label_encoder.inverse_transform(y_upload_pred)
-            df['potensi_prediksi'] = prediksi_label
-
-            # simpan ke DB (fungsi sudah robust menerima snake_case atau Title Case)
-            simpan_data_batch(df, "batch")
-
-            st.session_state['batch_df_result'] = df
-            st.session_state['batch_acc'] = acc
-
-    if 'batch_df_result' in st.session_state:
-        df = st.session_state['batch_df_result']
-        acc = st.session_state['batch_acc']
-        st.success(f"Akurasi Model (uji): {acc:.2%}")
+            progress = st.progress(0.0, text="Memproses data...")
+
+            def update_progress(fraksi, jumlah):
+                progress.progress(fraksi if fraksi is not None else 0.0,
+                                  text=f"Memproses data... {jumlah} siswa")
+
+            model = siapkan_model()
+            if model is not None:
+                fd, output_path = tempfile.mkstemp(prefix="hasil_prediksi_", suffix=".csv")
+                os.close(fd)
+                ringkasan = proses_batch_csv(uploaded_file, output_path, model=model, on_progress=update_progress)
+                st.session_state['batch_ringkasan'] = ringkasan
+                st.session_state['batch_output'] = output_path
+                # Upload tanpa baris baru / label berubah tidak memicu latih ulang
+                if ringkasan['tersimpan'] > 0:
+                    ajukan_latih()
+
+                if buat_zip and 0 < ringkasan['jumlah'] <= LAPORAN_ZIP_MAX:
+                    progress_zip = st.progress(0.0, text="Membuat laporan per siswa...")
+                    fd, zip_path = tempfile.mkstemp(prefix="laporan_siswa_", suffix=".zip")
+                    os.close(fd)
+                    generate_zip_laporan_siswa(
+                        pd.read_csv(output_path), zip_path,
+                        on_progress=lambda n, total: progress_zip.progress(
+                            n / total, text=f"Membuat laporan per siswa... {n}/{total}"
+                        )
+                    )
+                    st.session_state['batch_zip'] = zip_path
+                elif buat_zip:
+                    st.warning(f"Laporan per siswa hanya dibuat untuk maksimal {LAPORAN_ZIP_MAX} siswa.")
+
+    if 'batch_ringkasan' in st.session_state:
+        ringkasan = st.session_state['batch_ringkasan']
+        output_path = st.session_state['batch_output']
+        st.success(f"Akurasi Model (uji): {ringkasan['acc_model']:.2%}")
+        if ringkasan['acc_upload'] is not None:
+            st.success(f"Akurasi pada data upload berlabel: {ringkasan['acc_upload']:.2%}")
+        st.info(
+            f"{ringkasan['baru']} data siswa baru tersimpan, {ringkasan['diperbarui']} diperbarui, "
+            f"{ringkasan['dilewati']} dilewati (sudah ada di database)."
+        )
 
-        df_view = map_columns(df)
+        df_view = ringkasan['preview']
+        if ringkasan['jumlah'] > len(df_view):
+            st.caption(f"Menampilkan {len(df_view)} dari {ringkasan['jumlah']} baris hasil prediksi.")
         st.dataframe(df_view)
 
-        csv_out = df_view.to_csv(index=False).encode()
-        st.download_button(
-            "Download Hasil Prediksi (CSV)",
-            data=csv_out,
-            file_name="hasil_prediksi_potensi.csv",
-            mime="text/csv"
-        )
+        if os.path.exists(output_path):
+            with open(output_path, "rb") as f:
+                st.download_button(
+                    "Download Hasil Prediksi (CSV)",
+                    data=f,
+                    file_name="hasil_prediksi_potensi.csv",
+                    mime="text/csv"
+                )
 
-        pdf_batch = generate_pdf_report(df_view, "Laporan Batch Prediksi Siswa")
-        with open(pdf_batch, "rb") as f:
-            st.download_button(
-                "Download Laporan PDF Batch",
-                f,
-                file_name=os.path.basename(pdf_batch),
-                mime="application/pdf"
-            )
-        try:
-            os.remove(pdf_batch)
-        except Exception:
-            pass
-        del st.session_state['batch_df_result']
-        del st.session_state['batch_acc']
+            if ringkasan['jumlah'] <= BATCH_PDF_MAX:
+                judul_pdf = "Laporan Batch Prediksi Siswa"
+                st.download_button(
+                    "Download Laporan PDF Batch",
+                    generate_pdf_report(pd.read_csv(output_path), judul_pdf),
+                    file_name=nama_file_laporan(judul_pdf),
+                    mime="application/pdf"
+                )
+            else:
+                st.info(f"Laporan PDF batch tersedia untuk maksimal {BATCH_PDF_MAX} siswa. Gunakan unduhan CSV.")
+            try:
+                os.remove(output_path)
+            except Exception:
+                pass
+
+        zip_path = st.session_state.pop('batch_zip', None)
+        if zip_path and os.path.exists(zip_path):
+            with open(zip_path, "rb") as f:
+                st.download_button(
+                    "Download Laporan PDF per Siswa (ZIP)",
+                    f,
+                    file_name="laporan_per_siswa.zip",
+                    mime="application/zip"
+                )
+            try:
+                os.remove(zip_path)
+            except Exception:
+                pass
+        del st.session_state['batch_ringkasan']
+        del st.session_state['batch_output']
 
 # ========== MODE 3: DATA & VISUALISASI ==========
 if mode == "Data & Visualisasi":
     st.subheader("Data Siswa & Visualisasi")
-    df_db = ambil_semua_data()
-    if df_db.empty:
+    from utils.model_utils import evaluasi_dari_confusion
+    from utils.kolom_utils import map_columns
+    from utils.chart_utils import chart_pie, chart_bar
+
+    partisi = daftar_partisi()
+    # Default hanya partisi aktif (tahun ajaran berjalan); arsip disertakan bila diminta
+    lintas = bool(partisi) and st.checkbox(
+        f"Sertakan arsip tahun ajaran sebelumnya ({', '.join(p['nama'] for p in partisi)})", value=False
+    )
+    total_data = jumlah_data(lintas)
+    if total_data == 0:
         st.warning("Database masih kosong. Silakan input data dulu.")
     else:
-        if st.button("Kosongkan Database", type="primary"):
-            kosongkan_database()
-            st.warning("Database berhasil dikosongkan! Silakan refresh halaman.")
+        if jumlah_data() > 0 and st.button("Arsipkan & Kosongkan Database", type="primary"):
+            hasil_arsip = kosongkan_database()
+            st.warning(
+                "Data dipindahkan ke arsip "
+                + ", ".join(f"{nama} ({n} baris)" for nama, n in hasil_arsip.items())
+                + ". Database aktif kini kosong, silakan refresh halaman."
+            )
 
-        st.write(f"Jumlah seluruh data siswa dalam database: {len(df_db)}")
-        df_db_rename = map_columns(df_db)
-        st.dataframe(df_db_rename)
+        st.write(f"Jumlah seluruh data siswa dalam database: {total_data}")
+        jumlah_halaman = max(1, -(-total_data // UKURAN_HALAMAN))
+        halaman = st.number_input(
+            f"Halaman (1-{jumlah_halaman}, {UKURAN_HALAMAN} baris per halaman)",
+            min_value=1, max_value=jumlah_halaman, value=1, step=1
+        )
+        df_halaman = ambil_data_halaman((int(halaman) - 1) * UKURAN_HALAMAN, UKURAN_HALAMAN, lintas)
+        st.dataframe(map_columns(df_halaman))
+
+        per_sumber = hitung_per_sumber(lintas)
+        if not per_sumber.empty:
+            st.write("Jumlah data per sumber:")
+            st.dataframe(per_sumber.rename("Jumlah Siswa").to_frame())
+
+        # Agregat dihitung di SQLite (GROUP BY), bukan dari seluruh baris
+        count_prediksi = hitung_potensi_prediksi(lintas)
+        count_asli = hitung_potensi_asli(lintas)
 
         st.subheader("Distribusi Potensi Prediksi")
         col1, col2, col3 = st.columns(3)
         with col1:
-            fig1, ax1 = plt.subplots(figsize=(3.2, 3.2))
-            if 'Potensi Prediksi' in df_db_rename.columns:
-                df_db_rename['Potensi Prediksi'].value_counts().plot.pie(
-                    labels=df_db_rename['Potensi Prediksi'].value_counts().index,
-                    autopct='%1.0f%%',
-                    textprops={'fontsize': 11},
-                    startangle=90,
-                    ax=ax1
-                )
-                ax1.set_title("Pie Potensi Prediksi", fontsize=14)
-                ax1.axis("equal")
-                fig1.tight_layout(pad=0.2)
-                st.pyplot(fig1)
+            if not count_prediksi.empty:
+                st.image(chart_pie(count_prediksi, "Pie Potensi Prediksi"))
 
         with col2:
-            fig2, ax2 = plt.subplots(figsize=(3.2, 3.2))
-            if 'Potensi Prediksi' in df_db_rename.columns:
-                df_db_rename['Potensi Prediksi'].value_counts().plot.bar(ax=ax2)
-                ax2.set_xlabel("Potensi")
-                ax2.set_ylabel("Jumlah Siswa")
-                ax2.set_title("Bar Potensi Prediksi", fontsize=14)
-                fig2.tight_layout(pad=0.2)
-                st.pyplot(fig2)
+            if not count_prediksi.empty:
+                st.image(chart_bar(count_prediksi, "Bar Potensi Prediksi"))
 
         with col3:
-            if 'Potensi Asli' in df_db_rename.columns and df_db_rename['Potensi Asli'].notnull().any():
-                fig3, ax3 = plt.subplots(figsize=(3.2, 3.2))
-                df_db_rename['Potensi Asli'].value_counts().plot.pie(
-                    labels=df_db_rename['Potensi Asli'].value_counts().index,
-                    autopct='%1.0f%%',
-                    textprops={'fontsize': 11},
-                    startangle=90,
-                    ax=ax3
-                )
-                ax3.set_title("Pie Potensi Asli", fontsize=14)
-                ax3.axis("equal")
-                fig3.tight_layout(pad=0.2)
-                st.pyplot(fig3)
+            if not count_asli.empty:
+                st.image(chart_pie(count_asli, "Pie Potensi Asli"))
             else:
                 st.info("Tidak ada data Potensi Asli.")
 
-        if ('Potensi Asli' in df_db_rename.columns and
-            'Potensi Prediksi' in df_db_rename.columns and
-            df_db_rename['Potensi Asli'].notnull().any() and
-            df_db_rename['Potensi Prediksi'].notnull().any()):
-            df_eva = df_db_rename[df_db_rename['Potensi Asli'].notnull()]
-            y_true = df_eva['Potensi Asli']
-            y_pred = df_eva['Potensi Prediksi']
+        if not count_asli.empty and not count_prediksi.empty:
             st.subheader("Evaluasi Model")
-            if len(y_true.unique()) > 1:
-                from sklearn.metrics import accuracy_score, classification_report
-                acc_db = accuracy_score(y_true, y_pred)
+            if len(count_asli) > 1:
+                acc_db, cr_df = evaluasi_dari_confusion(hitung_confusion(lintas))
                 st.metric("Akurasi (Database)", f"{acc_db:.2%}")
-                cr_db = classification_report(y_true, y_pred, output_dict=True, zero_division=0)
-                cr_df = pd.DataFrame(cr_db).T
-                for drop_key in ['accuracy', 'macro avg', 'weighted avg']:
-                    if drop_key in cr_df.index:
-                        cr_df = cr_df.drop(index=drop_key)
                 st.write("Classification Report:")
                 st.dataframe(cr_df[['precision', 'recall', 'f1-score']])
             else:
@@ -394,10 +471,105 @@ if mode == "Data & Visualisasi":
 # ========== MODE 4: DATABASE ==========
 if mode == "Database":
     st.subheader("Backup Database (.db)")
-    dbfile_bytes = backup_db()
-    st.download_button("Download data_siswa.db", dbfile_bytes, file_name="data_siswa.db")
+    kompres = st.checkbox("Kompres backup (gzip)", value=True)
+    if st.button("Buat Backup"):
+        with st.spinner("Membuat snapshot database..."):
+            st.session_state['backup_path'] = buat_backup(kompres=kompres)
+
+    # Backup hanya dibuat saat diminta; unduhan disajikan dari file snapshot
+    backup_path = st.session_state.get('backup_path')
+    if backup_path and os.path.exists(backup_path):
+        with open(backup_path, "rb") as f:
+            st.download_button(
+                f"Download {os.path.basename(backup_path)}", f,
+                file_name=os.path.basename(backup_path),
+                mime="application/gzip" if backup_path.endswith(".gz") else "application/octet-stream"
+            )
+
+    snapshot = daftar_backup()
+    if snapshot:
+        st.write(f"Snapshot lokal (disimpan {BACKUP_KEEP} terbaru):")
+        st.dataframe(pd.DataFrame([
+            {"File": b['nama'], "Ukuran (KB)": round(b['ukuran'] / 1024, 1),
+             "Waktu": b['waktu'].strftime('%d/%m/%Y %H:%M:%S')}
+            for b in snapshot
+        ]))
+
+    partisi = daftar_partisi()
+    if partisi:
+        st.write("Arsip tahun ajaran (hasil \"Arsipkan & Kosongkan Database\"):")
+        st.dataframe(pd.DataFrame([
+            {"Tahun Ajaran": p['nama'], "File": os.path.basename(p['path']),
+             "Jumlah Siswa": p['jumlah'], "Ukuran (KB)": round(p['ukuran'] / 1024, 1)}
+            for p in partisi
+        ]))
+
+    st.subheader("Ringkasan Evaluasi")
+    st.caption(
+        "Hitungan confusion (Potensi Asli x Potensi Prediksi) diperbarui otomatis setiap data disimpan. "
+        "Hitung ulang dari seluruh data bila database diubah di luar aplikasi."
+    )
+    if st.button("Hitung Ulang Ringkasan Evaluasi"):
+        with st.spinner("Menghitung ulang dari seluruh data..."):
+            jumlah_berlabel = bangun_ulang_ringkasan_confusion()
+        st.success(f"Ringkasan evaluasi dihitung ulang dari {jumlah_berlabel} data berlabel.")
+    catat_mode()
     st.stop()
 
+# ========== MODE 5: PERFORMA (ADMIN) ==========
+if mode == "Performa":
+    st.subheader("Performa per Tahap")
+    from utils.model_utils import riwayat_model, LATIH_STRATEGI, info_cache_prediksi, reset_cache_prediksi
+
+    st.caption(
+        "Latensi p50/p95 dari pengukuran terakhir di proses ini "
+        "(baca DB, preprocess, latih MLP, simpan, PDF, dan tiap menu). "
+        "`app.mulai`: maks = cold start proses, p50 = rerun; `app.pemanasan`: cache yang diisi di latar."
+    )
+    df_perf = ringkasan_tahap()
+    if df_perf.empty:
+        st.info("Belum ada pengukuran. Gunakan menu lain terlebih dahulu.")
+    else:
+        st.dataframe(df_perf.rename(columns={
+            'tahap': 'Tahap', 'jumlah': 'Jumlah', 'p50_ms': 'p50 (ms)', 'p95_ms': 'p95 (ms)',
+            'maks_ms': 'Maks (ms)', 'rata_baris': 'Rata-rata Baris', 'terakhir': 'Terakhir'
+        }), hide_index=True)
+
+    st.subheader("Riwayat Model")
+    st.caption(f"Strategi data latih aktif: `{LATIH_STRATEGI}` (environment variable `LATIH_STRATEGI`).")
+    df_model = riwayat_model()
+    if df_model.empty:
+        st.info("Belum ada model di registry.")
+    else:
+        st.dataframe(df_model.rename(columns={
+            'waktu_latih': 'Waktu Latih', 'mode_latih': 'Mode', 'strategi_latih': 'Strategi',
+            'n_sampel': 'Sampel Latih', 'n_train': 'Data Berlabel', 'acc': 'Akurasi', 'detik_latih': 'Waktu Fit (dtk)'
+        }), hide_index=True)
+
+    st.subheader("Cache Prediksi")
+    cache = info_cache_prediksi()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Hit", cache['hit'])
+    col2.metric("Miss", cache['miss'])
+    col3.metric("Duplikat dalam Batch", cache['duplikat_batch'])
+    col4.metric("Rasio Hit", f"{cache['rasio_hit']:.1%}" if cache['rasio_hit'] is not None else "-")
+    st.caption(
+        f"{cache['ukuran']} dari maksimal {cache['maks']} vektor fitur tersimpan untuk model aktif; "
+        "cache otomatis dikosongkan saat model dilatih ulang."
+    )
+
+    path_log = log_aktif()
+    if path_log:
+        st.write(f"Log terstruktur (JSON per baris): `{path_log}`")
+    else:
+        st.write("Log file nonaktif. Set environment variable `PERF_LOG` untuk menulis log JSON.")
+    if st.button("Reset Pengukuran"):
+        reset_catatan()
+        reset_cache_prediksi()
+        st.rerun()
+
+catat_mode()
+
 # ========== FOOTER ==========
 st.markdown("---")
 st.markdown("Developed as Professional Academic Project.")
@@ -0,0 +1,256 @@
+"""
+Benchmark operasi utama aplikasi pada data siswa sintetis (1k - 1M baris).
+
+Contoh:
+    python benchmark.py                                  # 1k, 10k, 100k, 1M
+    python benchmark.py --ukuran 1000 10000 --ops latih prediksi
+    python benchmark.py --banding bench/hasil_20250101_120000.json
+    python benchmark.py --startup                        # waktu cold start impor app
+
+Hasil (waktu dinding & puncak memori per operasi) ditulis sebagai JSON ke
+folder bench/ agar bisa dibandingkan antar-run.
+"""
+import os
+import sys
+import gc
+import json
+import time
+import shutil
+import statistics
+import subprocess
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from utils import db_utils
+from utils.data_sintetis import buat_data_siswa
+from utils.model_utils import FTR, preprocess_df, train_and_predict, single_predict, reset_cache_prediksi
+from utils.pdf_utils import generate_pdf_report
+
+UKURAN_DEFAULT = [1_000, 10_000, 100_000, 1_000_000]
+BENCH_FOLDER = 'bench'
+SEED = 42
+PREDIKSI_PANGGILAN = 1000   # jumlah panggilan single_predict yang dirata-rata
+PDF_MAKS_BARIS = 2000       # batas baris laporan PDF (sama dengan BATCH_PDF_MAX di app)
+STARTUP_ULANG = 5           # jumlah proses Python baru per skenario startup (diambil median)
+
+# Modul utils yang diimpor app.py sebelum halaman pertama tampil:
+# 'penuh' = semua modul diimpor di atas (sklearn, matplotlib, fpdf), 'lazy' = per menu
+STARTUP_SKENARIO = {
+    'penuh': ['utils.model_utils', 'utils.train_worker', 'utils.db_utils', 'utils.pdf_utils',
+              'utils.batch_utils', 'utils.chart_utils', 'utils.perf_utils'],
+    'lazy': ['utils.train_worker', 'utils.db_utils', 'utils.perf_utils'],
+}
+
+def _db_baru(ctx):
+    # Setiap pengukuran simpan memakai file DB kosong sendiri
+    ctx['n_db'] = ctx.get('n_db', 0) + 1
+    db_utils.DB_PATH = os.path.join(ctx['tmp'], f"bench_{ctx['n']}_{ctx['n_db']}.db")
+    db_utils.init_db()
+
+def op_preprocess(ctx):
+    preprocess_df(ctx['df'])
+
+def op_simpan(ctx):
+    _db_baru(ctx)
+    return {'n_baris': db_utils.simpan_data_batch(ctx['df'], sumber='benchmark')['baru']}
+
+def op_ambil(ctx):
+    # baca dingin: cache DataFrame dikosongkan dulu
+    db_utils._DATA_CACHE.clear()
+    return {'n_baris': len(db_utils.ambil_semua_data())}
+
+def op_latih(ctx):
+    _, acc, label_encoder, mlp, scaler = train_and_predict(ctx['df'])
+    ctx['model'] = {'mlp': mlp, 'scaler': scaler, 'label_encoder': label_encoder}
+    return {'acc': round(float(acc), 4), 'n_iter': int(mlp.n_iter_)}
+
+def siapkan_prediksi(ctx):
+    # model & input disiapkan di luar pengukuran
+    if 'model' not in ctx:
+        op_latih(ctx)
+    ctx['input_prediksi'] = preprocess_df(ctx['df'].head(PREDIKSI_PANGGILAN))[FTR].to_dict('records')
+
+def op_prediksi(ctx):
+    # cache prediksi dikosongkan: yang diukur inferensi, bukan hit cache
+    reset_cache_prediksi()
+    mulai = time.perf_counter()
+    for input_dict in ctx['input_prediksi']:
+        single_predict(input_dict, ctx['model'])
+    n = len(ctx['input_prediksi'])
+    return {'n_panggilan': n, 'mikrodetik_per_panggilan': round((time.perf_counter() - mulai) / n * 1e6, 2)}
+
+def siapkan_prediksi_cache(ctx):
+    # input sama dengan op_prediksi; cache diisi dulu sehingga semua panggilan hit
+    siapkan_prediksi(ctx)
+    for input_dict in ctx['input_prediksi']:
+        single_predict(input_dict, ctx['model'])
+
+def op_prediksi_cache(ctx):
+    mulai = time.perf_counter()
+    for input_dict in ctx['input_prediksi']:
+        single_predict(input_dict, ctx['model'])
+    n = len(ctx['input_prediksi'])
+    return {'n_panggilan': n, 'mikrodetik_per_panggilan': round((time.perf_counter() - mulai) / n * 1e6, 2)}
+
+def op_pdf(ctx):
+    n = min(len(ctx['df']), PDF_MAKS_BARIS)
+    isi = generate_pdf_report(ctx['df'].head(n), "Benchmark Laporan")
+    return {'n_baris': n, 'ukuran_kb': round(len(isi) / 1024, 1)}
+
+# nama operasi -> (fungsi yang diukur, fungsi aplikasi, persiapan di luar pengukuran)
+OPERASI = {
+    'preprocess': (op_preprocess, 'preprocess_df', None),
+    'simpan': (op_simpan, 'simpan_data_batch', None),
+    'ambil': (op_ambil, 'ambil_semua_data', None),
+    'latih': (op_latih, 'train_and_predict', None),
+    'prediksi': (op_prediksi, 'single_predict', siapkan_prediksi),
+    'prediksi_cache': (op_prediksi_cache, 'single_predict (cache)', siapkan_prediksi_cache),
+    'pdf': (op_pdf, 'generate_pdf_report', None),
+}
+
+def ukur(fungsi, ctx, ulang=1, memori=True):
+    """(detik terbaik dari `ulang` run, puncak memori MB via tracemalloc, info operasi)."""
+    detik = []
+    info = None
+    for _ in range(ulang):
+        gc.collect()
+        mulai = time.perf_counter()
+        info = fungsi(ctx)
+        detik.append(time.perf_counter() - mulai)
+    puncak = None
+    if memori:
+        # run terpisah: tracemalloc memperlambat kode Python sehingga tidak dipakai untuk waktu
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fungsi(ctx)
+            puncak = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return min(detik), puncak, info or {}
+
+def _lingkungan():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+    }
+
+def jalankan(ukuran, ops, ulang=1, memori=True, seed=SEED, log=print):
+    hasil = []
+    tmp = tempfile.mkdtemp(prefix="bench_")
+    db_lama = db_utils.DB_PATH
+    try:
+        if 'pdf' in ops:
+            # pemanasan: parse logo PNG sekali (di aplikasi di-cache lintas laporan)
+            generate_pdf_report(buat_data_siswa(1, seed=seed), "Pemanasan")
+        for n in ukuran:
+            mulai = time.perf_counter()
+            ctx = {'n': n, 'tmp': tmp, 'df': buat_data_siswa(n, seed=seed)}
+            log(f"[{n:>9,} baris] data sintetis {time.perf_counter() - mulai:.2f} dtk")
+            _db_baru(ctx)
+            db_utils.simpan_data_batch(ctx['df'], sumber='benchmark')   # untuk 'ambil'
+            for nama in ops:
+                fungsi, keterangan, siapkan = OPERASI[nama]
+                if siapkan is not None:
+                    siapkan(ctx)
+                detik, puncak, info = ukur(fungsi, ctx, ulang=ulang, memori=memori)
+                hasil.append({'operasi': nama, 'fungsi': keterangan, 'n': n, 'detik': round(detik, 4),
+                              'puncak_mb': round(puncak, 2) if puncak is not None else None, **info})
+                teks_mem = f"{puncak:9.1f} MB" if puncak is not None else ""
+                log(f"[{n:>9,} baris] {nama:<10} {detik:9.3f} dtk {teks_mem}")
+            db_utils.tutup_semua_koneksi()
+    finally:
+        db_utils.tutup_semua_koneksi()
+        db_utils.DB_PATH = db_lama
+        db_utils._DATA_CACHE.clear()
+        shutil.rmtree(tmp, ignore_errors=True)
+    return hasil
+
+def ukur_startup(ulang=STARTUP_ULANG, log=print):
+    """
+    Waktu impor modul + init_db di proses Python baru (cold start, tanpa streamlit)
+    untuk tiap skenario STARTUP_SKENARIO; median dari `ulang` proses.
+    """
+    hasil = []
+    tmp = tempfile.mkdtemp(prefix="bench_startup_")
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    try:
+        for nama, modul in STARTUP_SKENARIO.items():
+            kode = (
+                "import time; t = time.perf_counter(); import " + ", ".join(modul) + "; "
+                "from utils.db_utils import init_db; init_db(); print(time.perf_counter() - t)"
+            )
+            detik = [
+                float(subprocess.run([sys.executable, "-c", kode], cwd=tmp, env=env, check=True,
+                                     capture_output=True, text=True).stdout)
+                for _ in range(ulang)
+            ]
+            hasil.append({'skenario': nama, 'modul': modul, 'detik': round(statistics.median(detik), 4),
+                          'min': round(min(detik), 4), 'maks': round(max(detik), 4)})
+            log(f"[startup] {nama:<6} {statistics.median(detik):7.3f} dtk (median {ulang} proses)")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return hasil
+
+def banding(hasil, path_lama, log=print):
+    """Cetak rasio waktu & memori terhadap hasil run sebelumnya (>1 berarti lebih lambat/boros)."""
+    with open(path_lama) as f:
+        lama = {(r['operasi'], r['n']): r for r in json.load(f)['hasil']}
+    for r in hasil:
+        dulu = lama.get((r['operasi'], r['n']))
+        if dulu is None:
+            continue
+        rasio_waktu = r['detik'] / dulu['detik'] if dulu['detik'] else float('nan')
+        teks = f"[{r['n']:>9,} baris] {r['operasi']:<10} waktu x{rasio_waktu:.2f}"
+        if r.get('puncak_mb') and dulu.get('puncak_mb'):
+            teks += f"  memori x{r['puncak_mb'] / dulu['puncak_mb']:.2f}"
+        log(teks)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark prediksi potensi siswa pada data sintetis")
+    parser.add_argument('--ukuran', type=int, nargs='+', default=UKURAN_DEFAULT, help="jumlah baris per skenario")
+    parser.add_argument('--ops', nargs='+', choices=list(OPERASI), default=list(OPERASI), help="operasi yang diukur")
+    parser.add_argument('--ulang', type=int, default=1, help="jumlah pengulangan waktu (diambil yang tercepat)")
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--tanpa-memori', action='store_true', help="lewati pengukuran puncak memori")
+    parser.add_argument('--output', help="path file JSON hasil (default bench/hasil_<waktu>.json)")
+    parser.add_argument('--banding', help="file JSON run sebelumnya untuk dibandingkan")
+    parser.add_argument('--startup', action='store_true', help="hanya ukur waktu cold start impor app (penuh vs lazy)")
+    args = parser.parse_args(argv)
+
+    laporan = {
+        'waktu': datetime.now().isoformat(timespec='seconds'),
+        'seed': args.seed,
+        'lingkungan': _lingkungan(),
+    }
+    if args.startup:
+        hasil = []
+        laporan['startup'] = ukur_startup()
+    else:
+        hasil = jalankan(args.ukuran, args.ops, ulang=args.ulang, memori=not args.tanpa_memori, seed=args.seed)
+    laporan['hasil'] = hasil
+    output = args.output
+    if output is None:
+        if not os.path.exists(BENCH_FOLDER):
+            os.makedirs(BENCH_FOLDER)
+        output = os.path.join(BENCH_FOLDER, f"hasil_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output, 'w') as f:
+        json.dump(laporan, f, indent=2)
+    print(f"Hasil disimpan ke {output}")
+    if args.banding:
+        banding(hasil, args.banding)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Prediksi batch tanpa antarmuka (tanpa streamlit/matplotlib) untuk seluruh CSV
+dalam satu folder, misalnya run malam hari untuk semua sekolah.
+
+Contoh:
+    python prediksi_batch.py data_sekolah/
+    python prediksi_batch.py data_sekolah/ --output hasil_malam --workers 4 --pola "smp_*.csv"
+
+Setiap file diproses oleh satu proses worker memakai pipeline yang sama dengan
+menu "Batch Simulasi" (preprocess_df -> prediksi -> simpan_data_batch). Model
+dimuat sekali di proses utama lalu dibagikan ke worker. Hasil per file ditulis
+ke <output>/<nama>_prediksi.csv, ringkasan seluruh run ke <output>/ringkasan.json.
+
+Status keluar:
+    0  semua file berhasil
+    1  sebagian/semua file gagal diproses
+    2  argumen salah / folder input tidak ditemukan / tidak ada file CSV
+    3  model tidak tersedia (belum ada data latih)
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from utils import db_utils
+from utils.batch_utils import proses_batch_csv
+from utils.model_utils import get_model
+
+KELUAR_OK = 0
+KELUAR_GAGAL = 1
+KELUAR_INPUT = 2
+KELUAR_MODEL = 3
+
+WORKERS_DEFAULT = min(4, os.cpu_count() or 1)
+OUTPUT_DEFAULT = 'hasil_batch'
+SUMBER_DEFAULT = 'batch-cli'
+
+_MODEL = None       # model milik proses worker (diisi _init_worker)
+
+def _init_worker(model):
+    global _MODEL
+    _MODEL = model
+    # koneksi pool (bila ada) milik proses induk tidak boleh dipakai ulang di worker
+    db_utils._POOL.clear()
+
+def _proses_file(path, output_path, sumber):
+    """Proses satu CSV di worker; error dikembalikan sebagai status, bukan exception."""
+    mulai = time.perf_counter()
+    hasil = {'file': os.path.basename(path), 'output': output_path}
+    try:
+        ringkasan = proses_batch_csv(path, output_path, model=_MODEL, sumber=sumber)
+    except Exception as e:
+        hasil.update(status='gagal', error=f"{type(e).__name__}: {e}")
+    else:
+        ringkasan.pop('preview', None)
+        ringkasan.pop('acc_model', None)
+        hasil.update(status='ok', **ringkasan)
+    hasil['detik'] = round(time.perf_counter() - mulai, 3)
+    return hasil
+
+def _konteks_proses():
+    # fork: worker mewarisi model yang sudah dimuat tanpa pickle ulang (Linux);
+    # platform tanpa fork memakai spawn, model dikirim sekali per worker
+    metode = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(metode)
+
+def jalankan(folder, output, pola='*.csv', workers=WORKERS_DEFAULT, sumber=SUMBER_DEFAULT, log=print):
+    """Proses seluruh CSV di folder; mengembalikan (status keluar, ringkasan run)."""
+    files = sorted(glob.glob(os.path.join(folder, pola)))
+    if not files:
+        log(f"Tidak ada file {pola} di {folder}")
+        return KELUAR_INPUT, None
+
+    mulai = time.perf_counter()
+    db_utils.init_db()
+    model = get_model()
+    if model is None:
+        log("Data latih tidak tersedia. Harap upload data batch dengan label potensi terlebih dahulu.")
+        return KELUAR_MODEL, None
+    model = {k: v for k, v in model.items() if k != 'engine'}   # engine dibangun ulang di worker
+    log(f"Model {model['fingerprint']} ({model.get('mode_latih')}, akurasi {model['acc']:.2%}) "
+        f"siap dalam {time.perf_counter() - mulai:.2f} dtk")
+
+    if not os.path.exists(output):
+        os.makedirs(output)
+    # koneksi SQLite tidak boleh ikut diwariskan ke worker hasil fork
+    db_utils.tutup_semua_koneksi()
+
+    hasil = []
+    workers = max(1, min(workers, len(files)))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_konteks_proses(),
+                             initializer=_init_worker, initargs=(model,)) as pool:
+        tugas = {
+            pool.submit(
+                _proses_file, path,
+                os.path.join(output, os.path.splitext(os.path.basename(path))[0] + "_prediksi.csv"),
+                sumber
+            ): path
+            for path in files
+        }
+        for fut in as_completed(tugas):
+            r = fut.result()
+            hasil.append(r)
+            if r['status'] == 'ok':
+                log(f"[ok]    {r['file']}: {r['jumlah']} baris, {r['baru']} baru, "
+                    f"{r['diperbarui']} diperbarui, {r['dilewati']} dilewati ({r['detik']:.2f} dtk)")
+            else:
+                log(f"[gagal] {r['file']}: {r['error']}")
+
+    hasil.sort(key=lambda r: r['file'])
+    berhasil = [r for r in hasil if r['status'] == 'ok']
+    berlabel = sum(r['berlabel'] for r in berhasil)
+    run = {
+        'waktu': datetime.now().isoformat(timespec='seconds'),
+        'folder': os.path.abspath(folder),
+        'model': {'fingerprint': model['fingerprint'], 'mode_latih': model.get('mode_latih'), 'acc': model['acc']},
+        'workers': workers,
+        'detik': round(time.perf_counter() - mulai, 3),
+        'jumlah_file': len(hasil),
+        'file_gagal': len(hasil) - len(berhasil),
+        'total': {
+            kunci: sum(r[kunci] for r in berhasil)
+            for kunci in ('jumlah', 'tersimpan', 'baru', 'diperbarui', 'dilewati', 'berlabel', 'benar')
+        },
+        'acc_upload': sum(r['benar'] for r in berhasil) / berlabel if berlabel else None,
+        'file': hasil,
+    }
+    with open(os.path.join(output, 'ringkasan.json'), 'w') as f:
+        json.dump(run, f, indent=2)
+    log(f"{len(berhasil)}/{len(hasil)} file berhasil, {run['total']['jumlah']} baris "
+        f"dalam {run['detik']:.2f} dtk. Ringkasan: {os.path.join(output, 'ringkasan.json')}")
+    return (KELUAR_OK if len(berhasil) == len(hasil) else KELUAR_GAGAL), run
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prediksi potensi siswa untuk seluruh CSV dalam satu folder")
+    parser.add_argument('folder', help="folder berisi file CSV siswa")
+    parser.add_argument('--output', default=OUTPUT_DEFAULT, help="folder hasil prediksi & ringkasan.json")
+    parser.add_argument('--pola', default='*.csv', help="pola nama file di dalam folder")
+    parser.add_argument('--workers', type=int, default=WORKERS_DEFAULT, help="jumlah proses paralel")
+    parser.add_argument('--sumber', default=SUMBER_DEFAULT, help="nilai kolom sumber di database")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.folder):
+        print(f"Folder tidak ditemukan: {args.folder}", file=sys.stderr)
+        return KELUAR_INPUT
+    status, _ = jalankan(args.folder, args.output, pola=args.pola, workers=args.workers, sumber=args.sumber)
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,341 @@
+"""
+Server HTTP prediksi potensi siswa (asyncio, tanpa dependensi tambahan) untuk
+aplikasi sekolah lain (sistem PPDB, portal BK, ...).
+
+Contoh:
+    python server_prediksi.py                       # http://127.0.0.1:8600
+    python server_prediksi.py --port 9000 --jendela-ms 5
+
+Endpoint (JSON):
+    POST /prediksi        {"jenis_kelamin": "L", "usia": 13, "nilai_mtk": 80, ...}
+                          -> {"potensi_prediksi": "Sains", "model": "<fingerprint>"}
+    POST /prediksi/batch  {"siswa": [{...}, {...}]}  (atau langsung list)
+                          -> {"potensi_prediksi": ["Sains", "Bahasa"], "model": "<fingerprint>"}
+    GET  /statistik       throughput, latensi p50/p95, ukuran micro-batch, cache prediksi, model aktif
+    GET  /sehat           status server & model
+    POST /model/muat-ulang  periksa registry model sekarang juga
+
+Kunci input sama dengan kolom database (snake_case) atau header CSV (Title Case).
+Permintaan yang datang bersamaan dikumpulkan dalam jendela beberapa milidetik
+lalu diprediksi dengan satu panggilan predict (vektor). Model dimuat dari
+registry (models/) dan otomatis diganti bila ada file model yang lebih baru.
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from utils.model_utils import (
+    vektor_fitur, muat_model_terbaru, versi_model_terbaru, prediksi_matriks, info_cache_prediksi
+)
+from utils.perf_utils import catat, ringkasan_tahap
+
+HOST_DEFAULT = '127.0.0.1'
+PORT_DEFAULT = 8600
+JENDELA_MS = 5              # lama menunggu permintaan lain sebelum satu micro-batch diprediksi
+BATCH_MAKS = 4096           # baris maksimum per micro-batch
+CEK_MODEL_DETIK = 5         # interval memeriksa model baru di registry
+MAKS_BODY = 8 * 2**20       # batas ukuran body permintaan (byte)
+THROUGHPUT_JENDELA = 60     # detik terakhir untuk menghitung throughput
+
+STATUS_TEKS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+class GalatHTTP(Exception):
+    def __init__(self, status, pesan):
+        super().__init__(pesan)
+        self.status = status
+        self.pesan = pesan
+
+class ServerPrediksi:
+    def __init__(self, jendela_ms=JENDELA_MS, batch_maks=BATCH_MAKS, cek_model=CEK_MODEL_DETIK, log=print):
+        self.jendela = jendela_ms / 1000.0
+        self.batch_maks = batch_maks
+        self.cek_model = cek_model
+        self.log = log
+        self.model = None
+        self.versi = None
+        self.n_muat = 0
+        self.dimuat = None
+        self.mulai = time.time()
+        self.permintaan = {}                # endpoint -> jumlah
+        self.galat = 0
+        self.baris = 0
+        self.n_batch = 0
+        self.maks_batch = 0
+        self._terakhir = deque()            # (waktu, baris) permintaan prediksi terakhir
+        self._antrian = None
+        # predict & unpickle dijalankan di luar event loop agar koneksi tetap dilayani
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prediksi")
+
+    # ---------- model ----------
+    async def muat_model(self):
+        """Muat model terbaru dari registry bila berbeda dengan yang aktif; True bila diganti."""
+        loop = asyncio.get_running_loop()
+        versi = await loop.run_in_executor(self._executor, versi_model_terbaru)
+        if versi is None or versi == self.versi:
+            return False
+        bundle = await loop.run_in_executor(self._executor, lambda: muat_model_terbaru(dari_disk=True))
+        if bundle is None:
+            return False
+        # satu assignment: micro-batch berikutnya memakai model baru
+        self.model, self.versi = bundle, versi
+        self.n_muat += 1
+        self.dimuat = datetime.now().isoformat(timespec='seconds')
+        self.log(f"Model {bundle['fingerprint']} ({bundle.get('mode_latih')}, akurasi {bundle['acc']:.2%}) dimuat")
+        return True
+
+    async def _pantau_model(self):
+        while True:
+            await asyncio.sleep(self.cek_model)
+            try:
+                await self.muat_model()
+            except Exception as e:
+                self.log(f"Gagal memuat model: {e}")
+
+    # ---------- micro-batching ----------
+    async def prediksi(self, X):
+        """Antrekan matriks fitur X; selesai setelah micro-batch yang memuatnya diprediksi."""
+        fut = asyncio.get_running_loop().create_future()
+        await self._antrian.put((X, fut))
+        return await fut
+
+    async def _pengumpul(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            kumpulan = [await self._antrian.get()]
+            n = len(kumpulan[0][0])
+            batas = loop.time() + self.jendela
+            while n < self.batch_maks:
+                if self._antrian.empty():
+                    sisa = batas - loop.time()
+                    if sisa <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._antrian.get(), sisa)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self._antrian.get_nowait()
+                kumpulan.append(item)
+                n += len(item[0])
+
+            model = self.model
+            X = np.concatenate([x for x, _ in kumpulan]) if len(kumpulan) > 1 else kumpulan[0][0]
+            mulai = time.perf_counter()
+            try:
+                # baris kembar & yang pernah diprediksi diambil dari cache prediksi
+                y = await loop.run_in_executor(self._executor, prediksi_matriks, X, model)
+            except Exception as e:
+                for _, fut in kumpulan:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            catat('server.micro_batch', time.perf_counter() - mulai, n, permintaan=len(kumpulan))
+            self.n_batch += 1
+            self.maks_batch = max(self.maks_batch, n)
+            awal = 0
+            for x, fut in kumpulan:
+                if not fut.done():
+                    fut.set_result((y[awal:awal + len(x)].tolist(), model['fingerprint']))
+                awal += len(x)
+
+    # ---------- endpoint ----------
+    def _matriks(self, daftar):
+        if not daftar:
+            raise GalatHTTP(400, "daftar siswa kosong")
+        try:
+            return np.array([vektor_fitur(d) for d in daftar], dtype=np.float64)
+        except (ValueError, AttributeError) as e:
+            raise GalatHTTP(400, str(e) if isinstance(e, ValueError) else "setiap siswa harus berupa objek JSON")
+
+    async def _prediksi_endpoint(self, body, batch):
+        if self.model is None:
+            raise GalatHTTP(503, "model belum tersedia; latih model dari aplikasi terlebih dahulu")
+        try:
+            data = json.loads(body or b"null")
+        except ValueError:
+            raise GalatHTTP(400, "body bukan JSON yang valid")
+        if batch:
+            daftar = data.get('siswa') if isinstance(data, dict) else data
+            if not isinstance(daftar, list):
+                raise GalatHTTP(400, "body batch harus list siswa atau {\"siswa\": [...]}")
+        else:
+            if not isinstance(data, dict):
+                raise GalatHTTP(400, "body harus objek JSON satu siswa")
+            daftar = [data]
+        label, fingerprint = await self.prediksi(self._matriks(daftar))
+        self.baris += len(label)
+        self._terakhir.append((time.time(), len(label)))
+        return {'potensi_prediksi': label if batch else label[0], 'model': fingerprint}
+
+    def statistik(self):
+        sekarang = time.time()
+        while self._terakhir and self._terakhir[0][0] < sekarang - THROUGHPUT_JENDELA:
+            self._terakhir.popleft()
+        rentang = min(THROUGHPUT_JENDELA, max(sekarang - self.mulai, 1e-9))
+        tahap = ringkasan_tahap()
+        tahap = tahap[tahap['tahap'].str.startswith('server.')]
+        return {
+            'uptime_detik': round(sekarang - self.mulai, 1),
+            'permintaan': dict(self.permintaan),
+            'galat': self.galat,
+            'baris_diprediksi': self.baris,
+            'throughput': {
+                'jendela_detik': THROUGHPUT_JENDELA,
+                'permintaan_per_detik': round(len(self._terakhir) / rentang, 2),
+                'baris_per_detik': round(sum(n for _, n in self._terakhir) / rentang, 2),
+            },
+            'micro_batch': {
+                'jendela_ms': self.jendela * 1000,
+                'jumlah': self.n_batch,
+                'rata_baris': round(self.baris / self.n_batch, 2) if self.n_batch else None,
+                'maks_baris': self.maks_batch,
+            },
+            # latensi per endpoint & per micro-batch dari perf_utils (rolling PERF_RIWAYAT terakhir)
+            'latensi': tahap.to_dict('records'),
+            'cache_prediksi': info_cache_prediksi(),
+            'model': self._info_model(),
+        }
+
+    def _info_model(self):
+        if self.model is None:
+            return None
+        return {
+            'fingerprint': self.model['fingerprint'], 'mode_latih': self.model.get('mode_latih'),
+            'acc': self.model['acc'], 'waktu_latih': self.model.get('waktu_latih'),
+            'dimuat': self.dimuat, 'jumlah_muat': self.n_muat,
+        }
+
+    async def _rute(self, metode, path, body):
+        rute = {
+            ('POST', '/prediksi'): lambda: self._prediksi_endpoint(body, batch=False),
+            ('POST', '/prediksi/batch'): lambda: self._prediksi_endpoint(body, batch=True),
+            ('GET', '/statistik'): self.statistik,
+            ('GET', '/sehat'): lambda: {'status': 'ok' if self.model else 'tanpa_model', 'model': self._info_model()},
+            ('POST', '/model/muat-ulang'): self._muat_ulang,
+        }
+        if (metode, path) in rute:
+            hasil = rute[(metode, path)]()
+            return await hasil if asyncio.iscoroutine(hasil) else hasil
+        if any(p == path for _, p in rute):
+            raise GalatHTTP(405, f"metode {metode} tidak didukung untuk {path}")
+        raise GalatHTTP(404, f"endpoint {path} tidak ada")
+
+    async def _muat_ulang(self):
+        diganti = await self.muat_model()
+        return {'diganti': diganti, 'model': self._info_model()}
+
+    # ---------- HTTP/1.1 minimal ----------
+    async def _tangani(self, reader, writer):
+        try:
+            while True:
+                baris = await reader.readline()
+                if not baris:
+                    break
+                try:
+                    metode, target, versi_http = baris.decode('latin-1').split()
+                except ValueError:
+                    await self._kirim(writer, 400, {'error': "request line tidak valid"}, tutup=True)
+                    break
+                header = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    kunci, _, nilai = h.decode('latin-1').partition(":")
+                    header[kunci.strip().lower()] = nilai.strip()
+                koneksi = header.get('connection', '').lower()
+                tutup = koneksi == 'close' or (versi_http == 'HTTP/1.0' and koneksi != 'keep-alive')
+
+                try:
+                    panjang = int(header.get('content-length') or 0)
+                except ValueError:
+                    panjang = -1
+                if panjang < 0:
+                    await self._kirim(writer, 400, {'error': "Content-Length tidak valid"}, tutup=True)
+                    break
+                if panjang > MAKS_BODY:
+                    await self._kirim(writer, 413, {'error': f"body melebihi {MAKS_BODY} byte"}, tutup=True)
+                    break
+                body = await reader.readexactly(panjang) if panjang else b""
+
+                path = target.split("?", 1)[0].rstrip("/") or "/"
+                mulai = time.perf_counter()
+                try:
+                    status, hasil = 200, await self._rute(metode, path, body)
+                except GalatHTTP as e:
+                    status, hasil = e.status, {'error': e.pesan}
+                except Exception as e:
+                    status, hasil = 500, {'error': f"{type(e).__name__}: {e}"}
+                kunci = f"{metode} {path}"
+                self.permintaan[kunci] = self.permintaan.get(kunci, 0) + 1
+                if status != 200:
+                    self.galat += 1
+                elif path.startswith('/prediksi'):
+                    n = len(hasil['potensi_prediksi']) if path.endswith('batch') else 1
+                    catat(f"server.{path.strip('/').replace('/', '_')}", time.perf_counter() - mulai, n)
+                await self._kirim(writer, status, hasil, tutup=tutup)
+                if tutup:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _kirim(self, writer, status, hasil, tutup=False):
+        isi = json.dumps(hasil, default=str).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEKS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(isi)}\r\n"
+            f"Connection: {'close' if tutup else 'keep-alive'}\r\n\r\n".encode('latin-1') + isi
+        )
+        await writer.drain()
+
+    async def jalankan(self, host=HOST_DEFAULT, port=PORT_DEFAULT, siap=None):
+        """Layani permintaan sampai dibatalkan. siap(port) dipanggil setelah socket terbuka."""
+        self._antrian = asyncio.Queue()
+        if not await self.muat_model():
+            self.log("Belum ada model di registry; /prediksi menjawab 503 sampai model disimpan.")
+        tugas = [asyncio.create_task(self._pengumpul()), asyncio.create_task(self._pantau_model())]
+        server = await asyncio.start_server(self._tangani, host, port)
+        port = server.sockets[0].getsockname()[1]
+        self.log(f"Server prediksi berjalan di http://{host}:{port}")
+        if siap is not None:
+            siap(port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for t in tugas:
+                t.cancel()
+            self._executor.shutdown(wait=False)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Server HTTP prediksi potensi siswa (JSON, micro-batching)")
+    parser.add_argument('--host', default=HOST_DEFAULT)
+    parser.add_argument('--port', type=int, default=PORT_DEFAULT)
+    parser.add_argument('--jendela-ms', type=float, default=JENDELA_MS, help="jendela pengumpulan micro-batch (ms)")
+    parser.add_argument('--batch-maks', type=int, default=BATCH_MAKS, help="baris maksimum per micro-batch")
+    parser.add_argument('--cek-model', type=float, default=CEK_MODEL_DETIK, help="interval cek model baru (detik)")
+    args = parser.parse_args(argv)
+
+    server = ServerPrediksi(jendela_ms=args.jendela_ms, batch_maks=args.batch_maks, cek_model=args.cek_model)
+    try:
+        asyncio.run(server.jalankan(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Server gagal berjalan: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
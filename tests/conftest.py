@@ -0,0 +1,58 @@
+import os
+import sys
+import shutil
+
+import pytest
+
+# Jalankan dari root project maupun dari folder tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import db_utils
+
+
+@pytest.fixture
+def db_sementara(tmp_path, monkeypatch):
+    """Project kosong di tmp_path: folder db/ & models/ relatif, DB baru terinisialisasi."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(db_utils.DB_FOLDER)
+    db_utils.init_db()
+    yield tmp_path
+    db_utils.tutup_semua_koneksi()
+
+
+@pytest.fixture(scope='session')
+def _proyek_terlatih(tmp_path_factory):
+    """Dilatih sekali per sesi: data sintetis berlabel + model di registry models/."""
+    from utils import model_utils
+    from utils.data_sintetis import buat_data_siswa
+
+    folder = tmp_path_factory.mktemp('terlatih')
+    cwd = os.getcwd()
+    os.chdir(folder)
+    try:
+        os.makedirs(db_utils.DB_FOLDER)
+        db_utils.init_db()
+        db_utils.simpan_data_batch(buat_data_siswa(2000))
+        model_utils._pasang_model(None)
+        model_utils.get_model()
+    finally:
+        model_utils._pasang_model(None)
+        db_utils.tutup_semua_koneksi()
+        os.chdir(cwd)
+    return folder
+
+
+@pytest.fixture
+def model_terlatih(_proyek_terlatih, tmp_path, monkeypatch):
+    """Salinan proyek terlatih di tmp_path; mengembalikan bundle model di registry."""
+    from utils import model_utils
+
+    proyek = tmp_path / 'proyek'
+    shutil.copytree(_proyek_terlatih, proyek)
+    monkeypatch.chdir(proyek)
+    model_utils._pasang_model(None)
+    model_utils.reset_cache_prediksi()
+    yield model_utils.muat_model_terbaru(dari_disk=True)
+    model_utils._pasang_model(None)
+    model_utils.reset_cache_prediksi()
+    db_utils.tutup_semua_koneksi()
@@ -0,0 +1,12 @@
+import os
+import sys
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_prediksi_batch_tanpa_fpdf():
+    # CLI batch hanya butuh nama kolom tampilan, bukan modul PDF
+    kode = "import sys, prediksi_batch; print('fpdf' in sys.modules, 'utils.pdf_utils' in sys.modules)"
+    hasil = subprocess.run([sys.executable, '-c', kode], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert hasil.stdout.split() == ['False', 'False']
@@ -0,0 +1,180 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import db_utils
+
+
+def _frame(awal, n):
+    """n siswa berbeda (nama unik) berlabel, mulai dari indeks awal."""
+    idx = range(awal, awal + n)
+    return pd.DataFrame({
+        'nama': [f"Siswa {i}" for i in idx],
+        'jenis_kelamin': ['L' if i % 2 else 'P' for i in idx],
+        'usia': 15,
+        'nilai_mtk': [60 + i % 40 for i in idx],
+        'nilai_ipa': 70, 'nilai_ips': 75, 'nilai_bindo': 80, 'nilai_bing': 85, 'nilai_tik': 90,
+        'minat_sains': 3, 'minat_bahasa': 2, 'minat_sosial': 4, 'minat_teknologi': 5,
+        'potensi_asli': 'Sains',
+    })
+
+
+def test_simpan_batch_penulis_bersamaan(db_sementara):
+    n_thread, n_baris = 4, 20000
+    laporan, galat = [None] * n_thread, []
+
+    def tulis(k):
+        try:
+            laporan[k] = db_utils.simpan_data_batch(_frame(k * n_baris, n_baris))
+        except Exception as e:
+            galat.append(e)
+
+    threads = [threading.Thread(target=tulis, args=(k,)) for k in range(n_thread)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not galat
+    for hasil in laporan:
+        assert hasil == {'total': n_baris, 'baru': n_baris, 'diperbarui': 0, 'dilewati': 0}
+    assert db_utils.jumlah_data() == n_thread * n_baris
+
+
+def test_simpan_batch_ulang_dan_ubah_label(db_sementara):
+    df = _frame(0, 100)
+    assert db_utils.simpan_data_batch(df)['baru'] == 100
+    assert db_utils.simpan_data_batch(df) == {'total': 100, 'baru': 0, 'diperbarui': 0, 'dilewati': 100}
+    df.loc[:9, 'potensi_asli'] = 'Bahasa'
+    assert db_utils.simpan_data_batch(df) == {'total': 100, 'baru': 0, 'diperbarui': 10, 'dilewati': 90}
+    assert db_utils.jumlah_data() == 100
+
+
+def test_nilai_pecahan_dedup_batch_dan_individu(db_sementara):
+    from utils.model_utils import preprocess_df
+
+    siswa = _frame(0, 1).iloc[0].to_dict()
+    siswa['nilai_mtk'] = 92.3
+    df = preprocess_df(pd.DataFrame([siswa]))
+    assert df['nilai_mtk'].iloc[0] == 92.3
+    assert db_utils.simpan_data_batch(df)['baru'] == 1
+    assert db_utils.simpan_data_siswa(siswa)['dilewati'] == 1
+    assert db_utils.jumlah_data() == 1
+
+
+def test_arsip_lebih_dari_batas_attach(db_sementara):
+    n_tahun = db_utils.ARSIP_MAKS_TAHUN + 2
+    db_utils.simpan_data_batch(_frame(0, 100 * n_tahun))
+    with db_utils.koneksi_db() as conn:
+        conn.execute(
+            "UPDATE DataSiswa SET waktu_input = datetime('2010-08-01', '+' || (id % ?) || ' years')", (n_tahun,)
+        )
+    assert len(db_utils.hitung_confusion()) > 0
+
+    hasil = db_utils.arsipkan_partisi_aktif()
+
+    assert hasil == {f"{t}/{t + 1}": 100 for t in range(2010, 2010 + n_tahun)}
+    assert [p['jumlah'] for p in db_utils.daftar_partisi()] == [100] * n_tahun
+    assert db_utils.jumlah_data() == 0
+    assert db_utils.hitung_confusion().empty
+    assert db_utils.jumlah_data(lintas_partisi=True) == 100 * n_tahun
+    assert db_utils.hitung_confusion(lintas_partisi=True)['jumlah'].sum() == 100 * n_tahun
+
+
+def _muat_penuh():
+    db_utils._DATA_CACHE.clear()
+    return db_utils.ambil_semua_data()
+
+
+def _sama(df_cache, df_penuh):
+    ke_objek = {c: object for c in db_utils.KOLOM_KATEGORI if c in df_penuh.columns}
+    pd.testing.assert_frame_equal(
+        df_cache.astype(ke_objek).reset_index(drop=True), df_penuh.astype(ke_objek).reset_index(drop=True)
+    )
+
+
+def test_ambil_semua_data_inkremental_sama_dengan_muat_penuh(db_sementara):
+    db_utils.simpan_data_batch(_frame(0, 300))
+    awal = db_utils.ambil_semua_data()
+    assert len(awal) == 300
+
+    # upsert: 100 baris baru + 300 lama (sebagian ganti label, sebagian tetap)
+    df = _frame(0, 400)
+    df.loc[:49, 'potensi_asli'] = 'Bahasa'
+    df.loc[300:, 'potensi_asli'] = 'Sosial'
+    db_utils.simpan_data_batch(df)
+    _sama(db_utils.ambil_semua_data(), _muat_penuh())
+
+    # hanya baris baru (jalur append inkremental)
+    db_utils.simpan_data_batch(_frame(400, 50))
+    inkremental = db_utils.ambil_semua_data()
+    assert len(inkremental) == 450
+    _sama(inkremental, _muat_penuh())
+
+    db_utils.arsipkan_partisi_aktif()
+    assert db_utils.ambil_semua_data().empty
+    db_utils.simpan_data_batch(_frame(1000, 20))
+    _sama(db_utils.ambil_semua_data(), _muat_penuh())
+
+
+def _harapan_sklearn(df):
+    from sklearn.metrics import accuracy_score, precision_recall_fscore_support
+
+    labels = sorted(set(df['potensi_asli']) | set(df['potensi_prediksi']))
+    p, r, f, s = precision_recall_fscore_support(
+        df['potensi_asli'], df['potensi_prediksi'], labels=labels, zero_division=0
+    )
+    report = pd.DataFrame({'precision': p, 'recall': r, 'f1-score': f, 'support': s.astype(float)}, index=labels)
+    return accuracy_score(df['potensi_asli'], df['potensi_prediksi']), report
+
+
+def _cek_confusion(df_hidup, lintas_partisi=False):
+    from utils.model_utils import evaluasi_dari_confusion
+
+    acc, report = evaluasi_dari_confusion(db_utils.hitung_confusion(lintas_partisi))
+    df_hidup = df_hidup[df_hidup['potensi_asli'].notna()]
+    if df_hidup.empty:
+        assert acc is None and report.empty
+        return
+    acc_sk, report_sk = _harapan_sklearn(df_hidup)
+    assert acc == pytest.approx(acc_sk)
+    pd.testing.assert_frame_equal(report, report_sk)
+
+
+def _tabel_hidup():
+    with db_utils.koneksi_db() as conn:
+        return pd.read_sql_query("SELECT potensi_asli, potensi_prediksi FROM DataSiswa", conn)
+
+
+def test_ringkasan_confusion_sama_dengan_sklearn(db_sementara):
+    from utils.data_sintetis import buat_data_siswa, POTENSI
+
+    rng = np.random.default_rng(0)
+    df = buat_data_siswa(2000, seed=1)
+    df['potensi_prediksi'] = rng.choice(POTENSI, len(df))
+    df.loc[rng.random(len(df)) < 0.05, 'potensi_prediksi'] = None      # tanpa prediksi -> '-'
+    df.loc[:99, 'potensi_asli'] = None                                  # belum berlabel
+    db_utils.simpan_data_batch(df)
+    _cek_confusion(_tabel_hidup())
+
+    # upsert: label berubah (termasuk yang semula kosong) beserta prediksinya
+    ubah = df.iloc[:400].copy()
+    ubah['potensi_asli'] = [
+        POTENSI[(POTENSI.index(p) + 1) % len(POTENSI)] if isinstance(p, str) else 'Sosial'
+        for p in ubah['potensi_asli']
+    ]
+    ubah['potensi_prediksi'] = rng.choice(POTENSI, len(ubah))
+    assert db_utils.simpan_data_batch(ubah)['diperbarui'] == 400
+    sebelum_arsip = _tabel_hidup()
+    _cek_confusion(sebelum_arsip)
+
+    # arsip: tabel hidup kosong, lintas partisi tetap menghitung baris arsip
+    db_utils.arsipkan_partisi_aktif()
+    _cek_confusion(_tabel_hidup())
+    baru = buat_data_siswa(500, seed=2)
+    baru['potensi_prediksi'] = rng.choice(POTENSI, len(baru))
+    db_utils.simpan_data_batch(baru)
+    _cek_confusion(_tabel_hidup())
+    _cek_confusion(pd.concat([sebelum_arsip, _tabel_hidup()]), lintas_partisi=True)
@@ -0,0 +1,105 @@
+import os
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from utils import db_utils, feature_store
+from utils.data_sintetis import buat_data_siswa
+
+
+def _sinkron_di_proses(_):
+    # koneksi pool milik proses induk tidak boleh dipakai ulang setelah fork
+    db_utils._POOL.clear()
+    return feature_store.sinkronkan_fitur()['n']
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason="butuh fork")
+def test_sinkron_bersamaan_antar_proses(db_sementara):
+    n = 20000
+    db_utils.simpan_data_batch(buat_data_siswa(n))
+    db_utils.tutup_semua_koneksi()
+    with multiprocessing.get_context('fork').Pool(4) as pool:
+        assert pool.map(_sinkron_di_proses, range(8)) == [n] * 8
+
+    kolom, meta = feature_store.muat_kolom()
+    assert meta['n'] == n
+    for nama, dtype in feature_store._KOLOM.items():
+        lebar = kolom['X'].shape[1] if nama == 'X' else 1
+        assert os.path.getsize(feature_store._path(nama)) == n * lebar * np.dtype(dtype).itemsize
+    assert np.array_equal(np.asarray(kolom['id']), np.arange(1, n + 1))
+
+
+def _baca_di_proses(antrean, lanjut):
+    db_utils._POOL.clear()
+    kolom, _ = feature_store.muat_kolom()
+    antrean.put(float(np.asarray(kolom['X'], dtype=np.float64).sum()))
+    lanjut.wait(60)
+    # memmap lama dibaca ulang penuh setelah proses lain membangun ulang snapshot
+    antrean.put(float(np.asarray(kolom['X'], dtype=np.float64).sum()))
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason="butuh fork")
+@pytest.mark.parametrize('n_baru', [0, 50000])
+def test_bangun_ulang_tidak_merusak_memmap_proses_lain(db_sementara, n_baru):
+    n = 50000
+    db_utils.simpan_data_batch(buat_data_siswa(n))
+    versi_awal = feature_store.sinkronkan_fitur()['versi']
+    db_utils.tutup_semua_koneksi()
+
+    ctx = multiprocessing.get_context('fork')
+    antrean, lanjut = ctx.Queue(), ctx.Event()
+    pembaca = ctx.Process(target=_baca_di_proses, args=(antrean, lanjut))
+    pembaca.start()
+    try:
+        checksum = antrean.get(timeout=60)
+        # arsip + isi ulang dengan ukuran sama (atau kosong) -> bangun ulang penuh
+        db_utils.arsipkan_partisi_aktif()
+        if n_baru:
+            db_utils.simpan_data_batch(buat_data_siswa(n_baru, seed=99))
+        meta = feature_store.sinkronkan_fitur()
+        assert meta['n'] == n_baru and meta['versi'] == versi_awal + 1
+    finally:
+        lanjut.set()
+        pembaca.join(60)
+    assert pembaca.exitcode == 0
+    assert antrean.get(timeout=10) == checksum
+
+
+def _cek_reservoir(meta, posisi, batas):
+    y = np.asarray(feature_store.muat_kolom(meta)[0]['y'])
+    assert len(y) == meta['n']
+    assert np.array_equal(posisi, np.unique(posisi)) and posisi.min() >= 0 and posisi.max() < meta['n']
+    # per kelas: semua baris bila di bawah batas, tepat `batas` bila di atasnya
+    for kelas, jumlah in enumerate(np.bincount(y)):
+        assert np.count_nonzero(y[posisi] == kelas) == min(jumlah, batas)
+
+
+def test_reservoir_seimbang_deterministik_dan_tetap_valid(db_sementara, monkeypatch):
+    batas = 100
+    monkeypatch.setattr(feature_store, 'RESERVOIR_PER_KELAS', batas)
+    monkeypatch.setattr(feature_store, 'FITUR_CHUNK', 300)
+    db_utils.simpan_data_batch(buat_data_siswa(1000, proporsi=[10, 5, 2, 1]))
+    meta = feature_store.sinkronkan_fitur()
+    posisi = feature_store.muat_reservoir()
+    _cek_reservoir(meta, posisi, batas)
+
+    # seed tetap -> bangun ulang dari nol memberi reservoir yang sama
+    for nama in os.listdir(feature_store.FITUR_FOLDER):
+        os.remove(os.path.join(feature_store.FITUR_FOLDER, nama))
+    assert np.array_equal(feature_store.muat_reservoir(), posisi)
+
+    # append: baris baru ikut diundi, reservoir tetap sinkron dengan meta
+    db_utils.simpan_data_batch(buat_data_siswa(500, seed=5, proporsi=[10, 5, 2, 1]))
+    meta = feature_store.sinkronkan_fitur()
+    assert meta['n'] == 1500
+    _cek_reservoir(meta, feature_store.muat_reservoir(), batas)
+    assert feature_store._baca_reservoir(meta)['total'] == 1500
+
+    # bangun ulang (arsip): reservoir versi lama tidak dipakai lagi
+    db_utils.arsipkan_partisi_aktif()
+    db_utils.simpan_data_batch(buat_data_siswa(800, seed=6, proporsi=[1, 1, 1, 8]))
+    meta_baru = feature_store.sinkronkan_fitur()
+    assert meta_baru['versi'] == meta['versi'] + 1 and meta_baru['n'] == 800
+    _cek_reservoir(meta_baru, feature_store.muat_reservoir(), batas)
+    assert feature_store._baca_reservoir(meta) is None
@@ -0,0 +1,145 @@
+import os
+
+import numpy as np
+
+from utils import model_utils
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_muat_model_terbaru_memasang_model_aktif(model_terlatih):
+    model_utils._pasang_model(None)
+    bundle = model_utils.muat_model_terbaru()
+    assert bundle['fingerprint'] == model_terlatih['fingerprint']
+    assert model_utils.muat_model_terbaru() is bundle
+    assert model_utils.muat_model(bundle['fingerprint']) is bundle
+
+
+def test_muat_model_terbaru_dari_disk_tidak_memasang(model_terlatih):
+    model_utils._pasang_model(None)
+    bundle = model_utils.muat_model_terbaru(dari_disk=True)
+    assert bundle['fingerprint'] == model_terlatih['fingerprint']
+    assert model_utils._MODEL_AKTIF is None
+
+
+def test_inference_engine_sama_dengan_sklearn(model_terlatih):
+    mlp, scaler, le = model_terlatih['mlp'], model_terlatih['scaler'], model_terlatih['label_encoder']
+    rng = np.random.default_rng(0)
+    n = 200000
+    X = np.column_stack([
+        rng.integers(0, 2, n), rng.uniform(12, 16, n),
+        rng.uniform(0, 100, (n, 6)), rng.uniform(1, 5, (n, 4)),
+    ])
+    harapan = le.inverse_transform(mlp.predict(scaler.transform(X)))
+    assert (model_utils.InferenceEngine(mlp, scaler, le).predict(X) == harapan).all()
+    model_utils.reset_cache_prediksi()
+    assert (model_utils.prediksi_matriks(X, model_terlatih) == harapan).all()
+
+
+def test_siapkan_data_latih_fallback_csv_tanpa_cache(db_sementara, monkeypatch):
+    from utils import db_utils
+    from utils.data_sintetis import buat_data_siswa
+
+    monkeypatch.setattr(model_utils, 'SAMPLE_CSV', os.path.join(ROOT, model_utils.SAMPLE_CSV))
+    db_utils._DATA_CACHE.clear()
+    db_utils.simpan_data_batch(buat_data_siswa(50).drop(columns='potensi_asli'))
+    df = model_utils.siapkan_data_latih()
+    assert len(df) > 0 and 'potensi_asli' in df.columns
+    assert db_utils.DB_PATH not in db_utils._DATA_CACHE
+
+
+def _acak(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.integers(0, 2, n), rng.uniform(12, 16, n),
+        rng.uniform(0, 100, (n, 6)), rng.uniform(1, 5, (n, 4)),
+    ])
+
+
+def _sama_dengan_sklearn(mlp, scaler, le, X):
+    harapan = le.inverse_transform(mlp.predict(scaler.transform(X)))
+    hasil = model_utils.InferenceEngine(mlp, scaler, le).predict(X)
+    assert (hasil == harapan).all()
+    return hasil
+
+
+def test_inference_engine_biner_sama_dengan_sklearn():
+    from utils.data_sintetis import buat_data_siswa
+
+    df = model_utils.preprocess_df(buat_data_siswa(600, proporsi=[1, 1, 0, 0]))
+    _, le, mlp, scaler, _ = model_utils.latih_mlp(
+        df[model_utils.FTR].to_numpy(dtype=np.float64), df['potensi_asli'].to_numpy()
+    )
+    assert mlp.n_outputs_ == 1 and len(le.classes_) == 2
+    hasil = _sama_dengan_sklearn(mlp, scaler, le, _acak(100000))
+    assert set(hasil) == set(le.classes_)
+
+
+def test_inference_engine_satu_kelas_sama_dengan_sklearn():
+    X = _acak(1, seed=3)
+    _, le, mlp, scaler, _ = model_utils.latih_mlp(X, np.array(['Sains']))
+    assert mlp.n_outputs_ == 1 and list(le.classes_) == ['Sains']
+    X_uji = _acak(10000, seed=4)
+    # logit output dipaksa positif maupun negatif: keduanya tetap satu-satunya kelas
+    for bias in (5.0, -5.0):
+        mlp.intercepts_[-1][:] = bias
+        assert set(_sama_dengan_sklearn(mlp, scaler, le, X_uji)) == {'Sains'}
+
+
+def _kolom_latih(n, proporsi=None, tahun_akhir=None):
+    from utils import db_utils, feature_store
+    from utils.data_sintetis import buat_data_siswa
+
+    db_utils.simpan_data_batch(buat_data_siswa(n, proporsi=proporsi))
+    # waktu_input tersebar 12 tahun ajaran s.d. tahun_akhir (default tahun ajaran berjalan)
+    with db_utils.koneksi_db() as conn:
+        conn.execute(
+            "UPDATE DataSiswa SET waktu_input = datetime(?, '-' || (id % 12) || ' years')",
+            (f"{tahun_akhir or db_utils.tahun_ajaran()}-08-01",)
+        )
+    return feature_store.muat_kolom()
+
+
+def test_strategi_stratified_batas_per_kelas_deterministik(db_sementara, monkeypatch):
+    kolom, meta = _kolom_latih(1000, proporsi=[10, 5, 2, 1])
+    assert model_utils.pilih_sampel_latih(kolom, meta, 'stratified') == (None, 'stratified')
+
+    batas = 80
+    monkeypatch.setattr(model_utils, 'LATIH_MAKS_PER_KELAS', batas)
+    posisi, strategi = model_utils.pilih_sampel_latih(kolom, meta, 'stratified')
+    assert strategi == 'stratified' and np.all(np.diff(posisi) > 0)
+    y = np.asarray(kolom['y'])
+    for kelas, jumlah in enumerate(np.bincount(y)):
+        assert np.count_nonzero(y[posisi] == kelas) == min(jumlah, batas)
+    # LATIH_SEED tetap -> sampel sama setiap pemanggilan
+    assert np.array_equal(model_utils.pilih_sampel_latih(kolom, meta, 'stratified')[0], posisi)
+
+
+def test_strategi_jendela_sesuai_waktu_input(db_sementara):
+    from utils import db_utils
+
+    kolom, meta = _kolom_latih(1000)
+    batas = model_utils.awal_jendela().strftime('%Y-%m-%d %H:%M:%S')
+    with db_utils.koneksi_db() as conn:
+        harapan = [r[0] for r in conn.execute(
+            "SELECT id FROM DataSiswa WHERE waktu_input >= ? ORDER BY id", (batas,))]
+    posisi, strategi = model_utils.pilih_sampel_latih(kolom, meta, 'jendela')
+    assert strategi == 'jendela' and 0 < len(harapan) < meta['n']
+    assert np.asarray(kolom['id'])[posisi].tolist() == harapan
+
+
+def test_strategi_jendela_kosong_memakai_semua_data(db_sementara):
+    kolom, meta = _kolom_latih(200, tahun_akhir=2000)
+    assert model_utils.pilih_sampel_latih(kolom, meta, 'jendela') == (None, 'semua')
+
+
+def test_strategi_reservoir_memakai_feature_store(db_sementara, monkeypatch):
+    from utils import feature_store
+
+    monkeypatch.setattr(feature_store, 'RESERVOIR_PER_KELAS', 50)
+    kolom, meta = _kolom_latih(600, proporsi=[10, 5, 2, 1])
+    posisi, strategi = model_utils.pilih_sampel_latih(kolom, meta, 'reservoir')
+    assert strategi == 'reservoir'
+    assert np.array_equal(posisi, feature_store.muat_reservoir(meta, kolom['y']))
+    y = np.asarray(kolom['y'])
+    assert np.bincount(y[posisi]).max() <= 50
@@ -0,0 +1,52 @@
+import os
+import zipfile
+
+import pytest
+
+from utils import pdf_utils
+from utils.data_sintetis import buat_data_siswa
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def di_root(monkeypatch):
+    # path logo relatif terhadap root project (juga bagi worker spawn)
+    monkeypatch.chdir(ROOT)
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_zip_laporan_siswa(di_root, tmp_path, max_workers):
+    df = buat_data_siswa(7)
+    df.loc[2, 'nama'] = "Siti/Nur'aini"
+    progress = []
+    output = tmp_path / "laporan.zip"
+
+    n = pdf_utils.generate_zip_laporan_siswa(
+        df, str(output), max_workers=max_workers, on_progress=lambda k, total: progress.append((k, total))
+    )
+
+    assert n == len(df)
+    assert progress == [(k, len(df)) for k in range(1, len(df) + 1)]
+    with zipfile.ZipFile(output) as zf:
+        nama = sorted(zf.namelist())
+        assert nama == sorted(
+            f"{i:04d}_{pdf_utils._slugify(v)}.pdf" for i, v in enumerate(df['nama'], start=1)
+        )
+        assert "0003_SitiNuraini.pdf" in nama
+        for info in zf.infolist():
+            isi = zf.read(info)
+            assert isi.startswith(b"%PDF")
+            # logo diperkecil sekali: satu laporan jauh di bawah ukuran PNG asli (~3 MB)
+            assert info.file_size < 250 * 1024
+
+
+def test_zip_laporan_kosong(di_root, tmp_path):
+    progress = []
+    output = tmp_path / "kosong.zip"
+    assert pdf_utils.generate_zip_laporan_siswa(
+        buat_data_siswa(0), str(output), on_progress=lambda *a: progress.append(a)
+    ) == 0
+    assert progress == []
+    with zipfile.ZipFile(output) as zf:
+        assert zf.namelist() == []
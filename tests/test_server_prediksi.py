@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import socket
+import asyncio
+import threading
+import http.client
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils import model_utils
+from utils.data_sintetis import buat_data_siswa
+from server_prediksi import ServerPrediksi
+
+
+@contextmanager
+def server_latar(**kwargs):
+    """Jalankan ServerPrediksi (port bebas) di event loop thread terpisah."""
+    srv = ServerPrediksi(log=lambda *a: None, **kwargs)
+    loop = asyncio.new_event_loop()
+    siap = threading.Event()
+    info = {}
+
+    def catat_port(port):
+        info['port'] = port
+        siap.set()
+
+    def jalan():
+        asyncio.set_event_loop(loop)
+        tugas = info['tugas'] = loop.create_task(srv.jalankan(port=0, siap=catat_port))
+        try:
+            loop.run_until_complete(tugas)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            loop.close()
+
+    thread = threading.Thread(target=jalan, daemon=True)
+    thread.start()
+    assert siap.wait(30), "server tidak kunjung siap"
+    try:
+        yield srv, info['port']
+    finally:
+        loop.call_soon_threadsafe(info['tugas'].cancel)
+        thread.join(10)
+
+
+def minta(port, metode, path, body=None):
+    """(status, json) satu permintaan HTTP; body dict/list dikirim sebagai JSON."""
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        conn.request(metode, path, body=body, headers={'Content-Type': 'application/json'})
+        resp = conn.getresponse()
+        return resp.status, json.loads(resp.read())
+    finally:
+        conn.close()
+
+
+def minta_mentah(port, data):
+    """Kirim byte HTTP apa adanya; status dari baris pertama respons (None bila koneksi diputus)."""
+    with socket.create_connection(('127.0.0.1', port), timeout=30) as sock:
+        sock.sendall(data)
+        respons = b""
+        while True:
+            potong = sock.recv(65536)
+            if not potong:
+                break
+            respons += potong
+    return int(respons.split()[1]) if respons else None
+
+
+def daftar_siswa(n, seed=7):
+    kolom = ['jenis_kelamin'] + model_utils.KOLOM_ANGKA
+    return buat_data_siswa(n, seed=seed)[kolom].to_dict('records')
+
+
+SISWA = daftar_siswa(1)[0]
+
+
+def test_tanpa_model_503(db_sementara):
+    model_utils._pasang_model(None)
+    with server_latar() as (_, port):
+        assert minta(port, 'GET', '/sehat')[1]['status'] == 'tanpa_model'
+        assert minta(port, 'POST', '/prediksi', daftar_siswa(1)[0])[0] == 503
+        assert minta(port, 'POST', '/prediksi/batch', daftar_siswa(2))[0] == 503
+
+
+def test_prediksi_satu_dan_batch(model_terlatih):
+    siswa = daftar_siswa(50)
+    X = [model_utils.vektor_fitur(s) for s in siswa]
+    harapan = model_utils.prediksi_matriks(X, model_terlatih).tolist()
+    with server_latar() as (_, port):
+        status, hasil = minta(port, 'POST', '/prediksi', siswa[0])
+        assert status == 200
+        assert hasil == {'potensi_prediksi': harapan[0], 'model': model_terlatih['fingerprint']}
+
+        status, hasil = minta(port, 'POST', '/prediksi/batch', {'siswa': siswa})
+        assert status == 200 and hasil['potensi_prediksi'] == harapan
+        assert minta(port, 'POST', '/prediksi/batch', siswa)[1]['potensi_prediksi'] == harapan
+
+        status, stat = minta(port, 'GET', '/statistik')
+        assert status == 200 and stat['baris_diprediksi'] == 1 + 2 * len(siswa)
+
+
+@pytest.mark.parametrize('path, body, pesan', [
+    ('/prediksi', '{"usia": 13', 'JSON'),
+    ('/prediksi', [1, 2], 'objek JSON'),
+    ('/prediksi', {'jenis_kelamin': 'L', 'usia': 13}, 'kolom wajib'),
+    ('/prediksi', dict(SISWA, nilai_mtk='delapan'), 'harus berupa angka'),
+    ('/prediksi/batch', [], 'kosong'),
+    ('/prediksi/batch', {'siswa': 'semua'}, 'list siswa'),
+    ('/prediksi/batch', [1], 'objek JSON'),
+])
+def test_permintaan_tidak_valid_400(model_terlatih, path, body, pesan):
+    with server_latar() as (_, port):
+        status, hasil = minta(port, 'POST', path, body)
+    assert status == 400 and pesan in hasil['error']
+
+
+def test_nilai_tidak_berhingga_ditolak(model_terlatih):
+    siswa = daftar_siswa(1)[0]
+    with server_latar() as (_, port):
+        for nilai in (float('nan'), float('inf'), float('-inf')):
+            body = json.dumps(dict(siswa, nilai_mtk=nilai))     # NaN / Infinity / -Infinity
+            status, hasil = minta(port, 'POST', '/prediksi', body)
+            assert status == 400 and 'berhingga' in hasil['error']
+        status, _ = minta(port, 'POST', '/prediksi/batch', [siswa, dict(siswa, usia='nan')])
+        assert status == 400
+
+
+def test_content_length_tidak_valid_400(model_terlatih):
+    with server_latar() as (_, port):
+        for panjang in (b'abc', b'-5'):
+            data = b"POST /prediksi HTTP/1.1\r\nHost: x\r\nContent-Length: " + panjang + b"\r\n\r\n{}"
+            assert minta_mentah(port, data) == 400
+        # server tetap melayani setelahnya
+        assert minta(port, 'GET', '/sehat')[0] == 200
+
+
+def test_404_dan_405(model_terlatih):
+    with server_latar() as (srv, port):
+        assert minta(port, 'GET', '/tidak-ada')[0] == 404
+        assert minta(port, 'GET', '/prediksi')[0] == 405
+        assert minta(port, 'POST', '/statistik')[0] == 405
+        assert srv.galat == 3
+
+
+def test_micro_batch_mengelompokkan_permintaan(model_terlatih):
+    siswa = daftar_siswa(32, seed=11)
+    with server_latar(jendela_ms=300) as (srv, port):
+        with ThreadPoolExecutor(max_workers=len(siswa)) as pool:
+            hasil = list(pool.map(lambda s: minta(port, 'POST', '/prediksi', s), siswa))
+        assert all(status == 200 for status, _ in hasil)
+        assert srv.n_batch < len(siswa)
+        assert srv.maks_batch > 1
+
+
+def test_muat_ulang_otomatis_model_baru(model_terlatih):
+    with server_latar(cek_model=0.1) as (_, port):
+        awal = minta(port, 'GET', '/sehat')[1]['model']
+        assert awal['fingerprint'] == model_terlatih['fingerprint'] and awal['jumlah_muat'] == 1
+
+        path = model_utils.simpan_model(dict(model_terlatih, fingerprint='uji-muat-ulang'))
+        sekarang = time.time() + 1
+        os.utime(path, (sekarang, sekarang))
+
+        batas = time.time() + 10
+        while time.time() < batas:
+            model = minta(port, 'GET', '/sehat')[1]['model']
+            if model['jumlah_muat'] == 2:
+                break
+            time.sleep(0.05)
+        assert model['fingerprint'] == 'uji-muat-ulang' and model['jumlah_muat'] == 2
+        assert minta(port, 'POST', '/prediksi', daftar_siswa(1)[0])[1]['model'] == 'uji-muat-ulang'
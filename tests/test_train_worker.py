@@ -0,0 +1,73 @@
+import threading
+
+import pytest
+
+from utils import db_utils, model_utils, train_worker
+from utils.data_sintetis import buat_data_siswa
+
+
+@pytest.fixture(autouse=True)
+def riwayat_job_kosong():
+    with train_worker._JOBS_LOCK:
+        train_worker._JOBS.clear()
+        train_worker._FUTURES.clear()
+    yield
+
+
+def test_job_sama_tidak_diantrekan_dua_kali(db_sementara, monkeypatch):
+    db_utils.simpan_data_batch(buat_data_siswa(20))
+    lepas, mulai = threading.Event(), threading.Event()
+    bundle = {'fingerprint': 'palsu', 'mode_latih': 'penuh'}
+
+    def get_model(on_progress=None):
+        mulai.set()
+        on_progress(0.5, "Setengah jalan")
+        assert lepas.wait(30)
+        return bundle
+
+    monkeypatch.setattr(model_utils, 'get_model', get_model)
+    job_id = train_worker.ajukan_latih()
+    assert train_worker.ajukan_latih() == job_id
+    assert mulai.wait(30)
+    status = train_worker.status_job(job_id)
+    assert status['status'] == 'berjalan' and status['progress'] == 0.5
+    assert train_worker.job_berjalan()['job_id'] == job_id
+
+    lepas.set()
+    assert train_worker.tunggu_job(job_id, timeout=30) == (bundle, None)
+    status = train_worker.status_job(job_id)
+    assert status['status'] == 'selesai' and status['progress'] == 1.0 and status['mode_latih'] == 'penuh'
+    assert train_worker.job_berjalan() is None
+    # job sebelumnya selesai: pengajuan berikutnya membuat job baru
+    job_baru = train_worker.ajukan_latih()
+    assert job_baru not in (None, job_id)
+    assert train_worker.tunggu_job(job_baru, timeout=30) == (bundle, None)
+
+
+def test_latih_gagal_dikembalikan_sebagai_galat(db_sementara, monkeypatch):
+    db_utils.simpan_data_batch(buat_data_siswa(20))
+
+    def get_model(on_progress=None):
+        raise RuntimeError("memori habis")
+
+    monkeypatch.setattr(model_utils, 'get_model', get_model)
+    model_utils._pasang_model(None)
+    model, job_id = train_worker.model_untuk_prediksi()
+    assert model is None and job_id is not None
+    assert train_worker.tunggu_job(job_id, timeout=30) == (None, "RuntimeError: memori habis")
+    status = train_worker.status_job(job_id)
+    assert status['status'] == 'gagal' and status['galat'] == "RuntimeError: memori habis"
+
+
+def test_model_diganti_setelah_latih(model_terlatih):
+    assert train_worker.model_untuk_prediksi() == (model_utils.muat_model_terbaru(), None)
+
+    db_utils.simpan_data_batch(buat_data_siswa(200, seed=99))
+    model, job_id = train_worker.model_untuk_prediksi()
+    # selama latih berjalan, model lama tetap dipakai
+    assert job_id is not None and model['fingerprint'] == model_terlatih['fingerprint']
+
+    baru, galat = train_worker.tunggu_job(job_id, timeout=120)
+    assert galat is None and baru['fingerprint'] == db_utils.fingerprint_data()
+    assert train_worker.model_untuk_prediksi() == (baru, None)
+    assert train_worker.status_job(job_id)['status'] == 'selesai'
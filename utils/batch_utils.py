@@ -0,0 +1,94 @@
+import pandas as pd
+
+from utils.model_utils import preprocess_df, prediksi_df, get_model
+from utils.db_utils import simpan_data_batch
+from utils.kolom_utils import map_columns
+from utils.perf_utils import terukur
+
+# Pipeline batch: baca CSV per chunk -> preprocess -> prediksi -> simpan
+CSV_CHUNK = 5000        # baris per chunk; memori puncak sebanding ukuran ini
+PREVIEW_ROWS = 200      # baris hasil yang disimpan untuk preview di layar
+
+def _ukuran_sumber(sumber_csv):
+    """Ukuran (byte) file-like/path untuk progress; None bila tidak diketahui."""
+    try:
+        pos = sumber_csv.tell()
+        sumber_csv.seek(0, 2)
+        ukuran = sumber_csv.tell()
+        sumber_csv.seek(pos)
+        return ukuran
+    except Exception:
+        return None
+
+def bersihkan_chunk(chunk):
+    """Rapikan nama kolom, preprocess, lalu buang baris dengan nama kosong / '-'."""
+    chunk.columns = [str(c).strip() for c in chunk.columns]
+    chunk = preprocess_df(chunk)
+    if 'nama' in chunk.columns:
+        nama = chunk['nama'].astype(str).str.strip()
+        chunk = chunk[(nama.str.lower() != "-") & (nama != "")]
+    return chunk
+
+@terukur('batch.proses_csv', lambda hasil, *a, **k: hasil['jumlah'])
+def proses_batch_csv(sumber_csv, output_path=None, model=None, sumber="batch",
+                     chunksize=CSV_CHUNK, on_progress=None):
+    """
+    Prediksi & simpan CSV siswa secara streaming (per chunk). Hasil tiap chunk
+    ditulis ke output_path (CSV, kolom Title Case) bila diberikan.
+    Mengembalikan ringkasan: jumlah baris, tersimpan (baru + diperbarui), baru,
+    diperbarui, dilewati (duplikat tanpa perubahan), akurasi, dan preview.
+    """
+    if model is None:
+        model = get_model()
+    if model is None:
+        raise ValueError("Data latih tidak tersedia. Harap upload data batch dengan label potensi terlebih dahulu.")
+
+    if isinstance(sumber_csv, str):
+        with open(sumber_csv, "rb") as f:
+            return proses_batch_csv(f, output_path, model, sumber, chunksize, on_progress)
+
+    total_bytes = _ukuran_sumber(sumber_csv)
+    ringkasan = {
+        'jumlah': 0, 'tersimpan': 0, 'baru': 0, 'diperbarui': 0, 'dilewati': 0,
+        'berlabel': 0, 'benar': 0, 'acc_model': model['acc'],
+    }
+    preview = []
+    header = True
+    for chunk in pd.read_csv(sumber_csv, chunksize=chunksize):
+        chunk = bersihkan_chunk(chunk)
+        if chunk.empty:
+            continue
+        chunk['potensi_prediksi'] = prediksi_df(chunk, model)
+        ringkasan['jumlah'] += len(chunk)
+        laporan = simpan_data_batch(chunk, sumber)
+        for kunci in ('baru', 'diperbarui', 'dilewati'):
+            ringkasan[kunci] += laporan[kunci]
+        ringkasan['tersimpan'] += laporan['baru'] + laporan['diperbarui']
+
+        if 'potensi_asli' in chunk.columns:
+            asli = chunk['potensi_asli']
+            berlabel = asli.notnull() & (asli != "") & (asli != "-")
+            ringkasan['berlabel'] += int(berlabel.sum())
+            ringkasan['benar'] += int((asli[berlabel] == chunk.loc[berlabel, 'potensi_prediksi']).sum())
+
+        chunk_out = map_columns(chunk)
+        if output_path:
+            chunk_out.to_csv(output_path, mode='w' if header else 'a', header=header, index=False)
+            header = False
+        sisa = PREVIEW_ROWS - sum(len(p) for p in preview)
+        if sisa > 0:
+            preview.append(chunk_out.head(sisa))
+
+        if on_progress is not None:
+            if total_bytes:
+                on_progress(min(1.0, sumber_csv.tell() / total_bytes), ringkasan['jumlah'])
+            else:
+                on_progress(None, ringkasan['jumlah'])
+
+    if on_progress is not None:
+        on_progress(1.0, ringkasan['jumlah'])
+    ringkasan['acc_upload'] = (
+        ringkasan['benar'] / ringkasan['berlabel'] if ringkasan['berlabel'] else None
+    )
+    ringkasan['preview'] = pd.concat(preview, ignore_index=True) if preview else pd.DataFrame()
+    return ringkasan
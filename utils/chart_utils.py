@@ -0,0 +1,48 @@
+import io
+from functools import lru_cache
+
+import matplotlib
+matplotlib.use("Agg")  # backend non-interaktif: aman dipakai dari thread Streamlit
+from matplotlib.figure import Figure
+import pandas as pd
+
+CHART_DPI = 200
+CHART_CACHE_SIZE = 64   # jumlah PNG chart yang disimpan di cache
+
+def _kunci(counts):
+    # Series hitungan -> tuple hashable; nilai agregat sekaligus menjadi versi data
+    return tuple((str(k), int(v)) for k, v in counts.items())
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def _render(jenis, data, judul, ukuran, fontsize, judul_size, startangle):
+    # Figure tanpa pyplot: tidak terdaftar di state global, dibebaskan begitu selesai
+    fig = Figure(figsize=(ukuran, ukuran))
+    try:
+        ax = fig.subplots()
+        ser = pd.Series(dict(data))
+        if jenis == 'pie':
+            ser.plot.pie(
+                labels=ser.index, autopct='%1.0f%%', textprops={'fontsize': fontsize},
+                startangle=startangle, ax=ax
+            )
+            ax.set_ylabel("")
+            ax.axis("equal")
+        else:
+            ser.plot.bar(ax=ax)
+            ax.set_xlabel("Potensi")
+            ax.set_ylabel("Jumlah Siswa")
+        ax.set_title(judul, fontsize=judul_size)
+        fig.tight_layout(pad=0.2)
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', dpi=CHART_DPI)
+        return buf.getvalue()
+    finally:
+        fig.clear()
+
+def chart_pie(counts, judul, ukuran=3.2, fontsize=11, judul_size=14, startangle=90):
+    """PNG pie chart dari Series hitungan; di-cache selama nilai hitungan sama."""
+    return _render('pie', _kunci(counts), judul, ukuran, fontsize, judul_size, startangle)
+
+def chart_bar(counts, judul, ukuran=3.2, judul_size=14):
+    """PNG bar chart dari Series hitungan; di-cache selama nilai hitungan sama."""
+    return _render('bar', _kunci(counts), judul, ukuran, None, judul_size, None)
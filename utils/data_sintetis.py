@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+# Generator data siswa sintetis (skema DataSiswa) untuk benchmark & uji beban.
+# Sebaran nilai/minat mengikuti contoh di data/: nilai 60-100, minat 1-5, usia 12-15.
+POTENSI = ['Sains', 'Bahasa', 'Sosial', 'Teknologi']
+PROPORSI_POTENSI = [0.25, 0.25, 0.25, 0.25]    # seperti data/data_siswa_seimbang.csv
+
+# Kolom nilai & minat yang "menonjol" untuk tiap potensi
+_CIRI_POTENSI = {
+    'Sains': (['nilai_mtk', 'nilai_ipa'], 'minat_sains'),
+    'Bahasa': (['nilai_bindo', 'nilai_bing'], 'minat_bahasa'),
+    'Sosial': (['nilai_ips'], 'minat_sosial'),
+    'Teknologi': (['nilai_tik', 'nilai_mtk'], 'minat_teknologi'),
+}
+_NILAI = ['nilai_mtk', 'nilai_ipa', 'nilai_ips', 'nilai_bindo', 'nilai_bing', 'nilai_tik']
+_MINAT = ['minat_sains', 'minat_bahasa', 'minat_sosial', 'minat_teknologi']
+_NAMA_DEPAN = ['Andi', 'Budi', 'Citra', 'Dewi', 'Eko', 'Fajar', 'Gita', 'Hadi', 'Intan', 'Joko',
+               'Kartika', 'Lestari', 'Made', 'Nur', 'Putri', 'Rina', 'Sari', 'Tono', 'Wahyu', 'Yusuf']
+_NAMA_BELAKANG = ['Prasetyo', 'Setiawan', 'Putri', 'Nur', 'Saputra', 'Wijaya', 'Hidayat',
+                  'Lestari', 'Kurniawan', 'Santoso', 'Rahmawati', 'Pratama']
+
+def buat_data_siswa(n, seed=42, proporsi=None, sumber='sintetis', waktu_awal='2025-07-14'):
+    """
+    DataFrame n siswa sintetis dengan kolom DataSiswa (nama ... potensi_asli, sumber,
+    waktu_input). Potensi diundi sesuai proporsi, lalu nilai & minat yang berkaitan
+    dinaikkan sehingga label dapat dipelajari model. Hasil deterministik per seed.
+    """
+    rng = np.random.default_rng(seed)
+    proporsi = PROPORSI_POTENSI if proporsi is None else proporsi
+    kode = rng.choice(len(POTENSI), size=n, p=np.asarray(proporsi, dtype=float) / np.sum(proporsi))
+
+    data = {
+        'nama': pd.Categorical.from_codes(
+            rng.integers(0, len(_NAMA_DEPAN), n), _NAMA_DEPAN
+        ).astype(str) + ' ' + pd.Categorical.from_codes(
+            rng.integers(0, len(_NAMA_BELAKANG), n), _NAMA_BELAKANG
+        ).astype(str),
+        'jenis_kelamin': np.where(rng.random(n) < 0.5, 'L', 'P'),
+        'usia': rng.integers(12, 16, n),
+    }
+    for col in _NILAI:
+        data[col] = rng.normal(76, 9, n)
+    for col in _MINAT:
+        data[col] = rng.normal(2.6, 1.0, n)
+
+    for i, potensi in enumerate(POTENSI):
+        cocok = kode == i
+        kolom_nilai, kolom_minat = _CIRI_POTENSI[potensi]
+        for col in kolom_nilai:
+            data[col][cocok] += rng.normal(12, 4, cocok.sum())
+        data[kolom_minat][cocok] += rng.normal(1.8, 0.6, cocok.sum())
+
+    for col in _NILAI:
+        data[col] = np.clip(np.rint(data[col]), 60, 100).astype(int)
+    for col in _MINAT:
+        data[col] = np.clip(np.rint(data[col]), 1, 5).astype(int)
+
+    df = pd.DataFrame(data)
+    df['potensi_asli'] = np.asarray(POTENSI)[kode]
+    df['sumber'] = sumber
+    # waktu_input berurutan, satu detik per baris
+    df['waktu_input'] = (
+        pd.Timestamp(waktu_awal) + pd.to_timedelta(np.arange(n), unit='s')
+    ).strftime('%Y-%m-%d %H:%M:%S')
+    return df
@@ -1,6 +1,15 @@
 import os
+import gzip
+import hashlib
+import queue
+import shutil
 import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import numpy as np
 import pandas as pd
+from utils.perf_utils import terukur
 
 # Path database relatif dari root project
 DB_FOLDER = 'db'
@@ -10,108 +19,744 @@ DB_PATH = os.path.join(DB_FOLDER, 'data_siswa.db')
 if not os.path.exists(DB_FOLDER):
     os.makedirs(DB_FOLDER)
 
+# Snapshot backup lokal (SQLite backup API) & kebijakan retensi
+BACKUP_FOLDER = os.path.join(DB_FOLDER, 'backup')
+BACKUP_KEEP = 7             # jumlah snapshot terbaru yang disimpan
+BACKUP_PAGES = 1024         # halaman per langkah backup (tidak mengunci DB lama)
+BACKUP_BUFFER = 1024 * 1024 # ukuran buffer kompresi streaming
+
+# Partisi per tahun ajaran: tabel aktif di DB_PATH, tahun ajaran yang sudah
+# diarsipkan masing-masing satu file SQLite di ARSIP_FOLDER
+ARSIP_FOLDER = os.path.join(DB_FOLDER, 'arsip')
+BULAN_AWAL_TAHUN_AJARAN = 7     # tahun ajaran dimulai bulan Juli
+ARSIP_MAKS_TAHUN = 8            # tahun ajaran per transaksi arsip (batas ATTACH SQLite = 10)
+
+# Pengaturan koneksi: WAL agar pembaca tidak terblokir saat batch insert
+DB_TIMEOUT = 30             # detik menunggu lock (busy timeout)
+DB_POOL_SIZE = 8            # koneksi idle maksimum per file DB
+DB_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",     # ~16 MB page cache
+    "PRAGMA mmap_size=134217728",   # 128 MB memory-mapped I/O
+    "PRAGMA temp_store=MEMORY",
+    f"PRAGMA busy_timeout={DB_TIMEOUT * 1000}",
+)
+
+# Pool koneksi per path DB: {path: LifoQueue}
+_POOL = {}
+_POOL_LOCK = threading.Lock()
+
+# Representasi kompak DataSiswa di memori: teks berulang -> category,
+# angka bulat -> tipe terkecil yang memuat nilainya (nilai 0-100 & minat 1-5 -> int8),
+# angka pecahan tetap float64
+KOLOM_KATEGORI = ['jenis_kelamin', 'potensi_asli', 'potensi_prediksi', 'sumber']
+KOLOM_ANGKA = [
+    'usia', 'nilai_mtk', 'nilai_ipa', 'nilai_ips', 'nilai_bindo', 'nilai_bing', 'nilai_tik',
+    'minat_sains', 'minat_bahasa', 'minat_sosial', 'minat_teknologi'
+]
+BACA_CHUNK = 50000  # baris per chunk saat memuat seluruh tabel (dipadatkan per chunk)
+
+# Cache DataFrame DataSiswa per path DB: {path: {'versi': ..., 'df': ...}}
+_DATA_CACHE = {}
+_DATA_LOCK = threading.Lock()
+
+def _buka_koneksi(path):
+    conn = sqlite3.connect(path, timeout=DB_TIMEOUT, check_same_thread=False)
+    for pragma in DB_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def _pool(path):
+    with _POOL_LOCK:
+        if path not in _POOL:
+            _POOL[path] = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+        return _POOL[path]
+
+@contextmanager
+def koneksi_db():
+    """
+    Pinjam koneksi dari pool (thread-safe). Commit otomatis bila blok sukses,
+    rollback bila terjadi error, lalu koneksi dikembalikan ke pool.
+    """
+    path = DB_PATH
+    pool = _pool(path)
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = _buka_koneksi(path)
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+def tutup_semua_koneksi():
+    """Tutup seluruh koneksi idle di pool (mis. sebelum file DB diganti)."""
+    with _POOL_LOCK:
+        pools = list(_POOL.values())
+        _POOL.clear()
+    for pool in pools:
+        while True:
+            try:
+                pool.get_nowait().close()
+            except queue.Empty:
+                break
+
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS DataSiswa (
-        id INTEGER PRIMARY KEY,
-        nama TEXT,
-        jenis_kelamin TEXT,
-        usia INTEGER,
-        nilai_mtk REAL,
-        nilai_ipa REAL,
-        nilai_ips REAL,
-        nilai_bindo REAL,
-        nilai_bing REAL,
-        nilai_tik REAL,
-        minat_sains INTEGER,
-        minat_bahasa INTEGER,
-        minat_sosial INTEGER,
-        minat_teknologi INTEGER,
-        potensi_asli TEXT,
-        potensi_prediksi TEXT,
-        sumber TEXT,
-        waktu_input TIMESTAMP
-    )
+    with koneksi_db() as conn:
+        c = conn.cursor()
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS DataSiswa (
+            id INTEGER PRIMARY KEY,
+            nama TEXT,
+            jenis_kelamin TEXT,
+            usia INTEGER,
+            nilai_mtk REAL,
+            nilai_ipa REAL,
+            nilai_ips REAL,
+            nilai_bindo REAL,
+            nilai_bing REAL,
+            nilai_tik REAL,
+            minat_sains INTEGER,
+            minat_bahasa INTEGER,
+            minat_sosial INTEGER,
+            minat_teknologi INTEGER,
+            potensi_asli TEXT,
+            potensi_prediksi TEXT,
+            sumber TEXT,
+            waktu_input TIMESTAMP
+        )
+        """)
+        # Penghitung generasi data: naik setiap ada penghapusan/perubahan baris
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS MetaData (
+            kunci TEXT PRIMARY KEY,
+            nilai INTEGER
+        )
+        """)
+        c.execute("INSERT OR IGNORE INTO MetaData (kunci, nilai) VALUES ('generasi', 0)")
+        # Index untuk agregasi dashboard (GROUP BY) & filter waktu
+        c.execute("CREATE INDEX IF NOT EXISTS idx_siswa_prediksi ON DataSiswa (potensi_prediksi)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_siswa_asli_prediksi ON DataSiswa (potensi_asli, potensi_prediksi)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_siswa_sumber ON DataSiswa (sumber)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_siswa_waktu ON DataSiswa (waktu_input)")
+        # Hash isi baris (kunci alami siswa) untuk deduplikasi / upsert
+        kolom = [row[1] for row in c.execute("PRAGMA table_info(DataSiswa)")]
+        if 'hash_konten' not in kolom:
+            c.execute("ALTER TABLE DataSiswa ADD COLUMN hash_konten TEXT")
+            _isi_hash_lama(conn)
+        c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_siswa_hash ON DataSiswa (hash_konten)")
+        # Ringkasan confusion (potensi_asli x potensi_prediksi) dijaga trigger
+        ada = c.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'RingkasanConfusion'"
+        ).fetchone()
+        c.execute(SQL_TABEL_CONFUSION.format(skema='main'))
+        _buat_trigger_confusion(conn)
+        if not ada:
+            _isi_ringkasan_confusion(conn, 'main')
+
+# Hitungan pasangan (potensi_asli, potensi_prediksi) untuk baris berlabel
+# (potensi_asli IS NOT NULL). potensi_prediksi NULL disimpan sebagai '' karena
+# kolom primary key; dikembalikan menjadi NULL saat dibaca.
+SQL_TABEL_CONFUSION = """
+CREATE TABLE IF NOT EXISTS {skema}.RingkasanConfusion (
+    potensi_asli TEXT NOT NULL,
+    potensi_prediksi TEXT NOT NULL,
+    jumlah INTEGER NOT NULL,
+    PRIMARY KEY (potensi_asli, potensi_prediksi)
+) WITHOUT ROWID
+"""
+
+_SQL_CONFUSION_TAMBAH = """
+    INSERT INTO RingkasanConfusion (potensi_asli, potensi_prediksi, jumlah)
+    SELECT NEW.potensi_asli, COALESCE(NEW.potensi_prediksi, ''), 1 WHERE NEW.potensi_asli IS NOT NULL
+    ON CONFLICT (potensi_asli, potensi_prediksi) DO UPDATE SET jumlah = jumlah + 1;"""
+_SQL_CONFUSION_KURANG = """
+    UPDATE RingkasanConfusion SET jumlah = jumlah - 1
+    WHERE potensi_asli = OLD.potensi_asli AND potensi_prediksi = COALESCE(OLD.potensi_prediksi, '');
+    DELETE FROM RingkasanConfusion
+    WHERE potensi_asli = OLD.potensi_asli AND potensi_prediksi = COALESCE(OLD.potensi_prediksi, '')
+        AND jumlah <= 0;"""
+TRIGGER_CONFUSION = {
+    'trg_confusion_insert': f"AFTER INSERT ON DataSiswa BEGIN {_SQL_CONFUSION_TAMBAH} END",
+    'trg_confusion_update': (
+        "AFTER UPDATE OF potensi_asli, potensi_prediksi ON DataSiswa "
+        f"BEGIN {_SQL_CONFUSION_KURANG} {_SQL_CONFUSION_TAMBAH} END"
+    ),
+    'trg_confusion_delete': f"AFTER DELETE ON DataSiswa BEGIN {_SQL_CONFUSION_KURANG} END",
+}
+
+def _buat_trigger_confusion(conn):
+    for nama, isi in TRIGGER_CONFUSION.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {nama} {isi}")
+
+def _hapus_trigger_confusion(conn):
+    for nama in TRIGGER_CONFUSION:
+        conn.execute(f"DROP TRIGGER IF EXISTS main.{nama}")
+
+def _isi_ringkasan_confusion(conn, skema):
+    conn.execute(f"DELETE FROM {skema}.RingkasanConfusion")
+    conn.execute(f"""
+    INSERT INTO {skema}.RingkasanConfusion (potensi_asli, potensi_prediksi, jumlah)
+    SELECT potensi_asli, COALESCE(potensi_prediksi, ''), COUNT(*) FROM {skema}.DataSiswa
+    WHERE potensi_asli IS NOT NULL
+    GROUP BY potensi_asli, COALESCE(potensi_prediksi, '')
     """)
-    conn.commit()
-    conn.close()
 
-def _pick(row, *keys, default=None):
-    for k in keys:
-        if k in row and pd.notna(row[k]):
-            return row[k]
-    return default
+@terukur('db.bangun_ulang_confusion')
+def bangun_ulang_ringkasan_confusion():
+    """
+    Hitung ulang tabel RingkasanConfusion dari seluruh baris DataSiswa (pemeriksaan
+    konsistensi / setelah data diubah di luar aplikasi). Mengembalikan jumlah baris berlabel.
+    """
+    with koneksi_db() as conn:
+        conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        _isi_ringkasan_confusion(conn, 'main')
+        return conn.execute("SELECT COALESCE(SUM(jumlah), 0) FROM RingkasanConfusion").fetchone()[0]
+
+def _isi_hash_lama(conn):
+    # Migrasi DB lama: hash untuk baris yang sudah ada. Duplikat lama dibiarkan
+    # (hash NULL) agar tidak ada data yang dihapus diam-diam.
+    terpakai = {}
+    for df in pd.read_sql_query(
+        "SELECT * FROM DataSiswa WHERE hash_konten IS NULL ORDER BY id", conn, chunksize=BATCH_CHUNK
+    ):
+        for id_baris, h in zip(df['id'].tolist(), hash_konten(normalisasi_batch(df))):
+            terpakai.setdefault(h, id_baris)
+    # UPDATE setelah pembacaan selesai (tidak mengubah tabel yang sedang dibaca)
+    conn.executemany("UPDATE DataSiswa SET hash_konten = ? WHERE id = ?", terpakai.items())
+
+# Kolom yang dibaca ke DataFrame (hash_konten hanya dipakai di sisi DB)
+SELECT_DATA = """
+SELECT id, nama, jenis_kelamin, usia, nilai_mtk, nilai_ipa, nilai_ips, nilai_bindo, nilai_bing, nilai_tik,
+    minat_sains, minat_bahasa, minat_sosial, minat_teknologi,
+    potensi_asli, potensi_prediksi, sumber, waktu_input
+FROM DataSiswa"""
+
+# Upsert per hash isi: siswa yang sama tidak disimpan dua kali. Baris lama hanya
+# diperbarui bila label potensi_asli baru terisi dan berbeda; selain itu dilewati.
+INSERT_SQL = """
+INSERT INTO DataSiswa (
+    nama, jenis_kelamin, usia, nilai_mtk, nilai_ipa, nilai_ips, nilai_bindo, nilai_bing, nilai_tik,
+    minat_sains, minat_bahasa, minat_sosial, minat_teknologi,
+    potensi_asli, potensi_prediksi, sumber, hash_konten, waktu_input
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now','localtime'))
+ON CONFLICT (hash_konten) DO UPDATE SET
+    potensi_asli = excluded.potensi_asli,
+    potensi_prediksi = excluded.potensi_prediksi,
+    sumber = excluded.sumber,
+    waktu_input = excluded.waktu_input
+WHERE excluded.potensi_asli IS NOT NULL AND excluded.potensi_asli NOT IN ('', '-')
+    AND excluded.potensi_asli IS NOT DataSiswa.potensi_asli
+"""
 
+# Kolom DB -> (alias snake_case / Title Case, default, tipe)
+BATCH_KOLOM = [
+    ('nama', ('nama', 'Nama'), '-', str),
+    ('jenis_kelamin', ('jenis_kelamin', 'Jenis Kelamin'), '-', str),
+    ('usia', ('usia', 'Usia'), 0, int),
+    ('nilai_mtk', ('nilai_mtk', 'Nilai Matematika'), 0, float),
+    ('nilai_ipa', ('nilai_ipa', 'Nilai IPA'), 0, float),
+    ('nilai_ips', ('nilai_ips', 'Nilai IPS'), 0, float),
+    ('nilai_bindo', ('nilai_bindo', 'Nilai Bahasa Indonesia'), 0, float),
+    ('nilai_bing', ('nilai_bing', 'Nilai Bahasa Inggris'), 0, float),
+    ('nilai_tik', ('nilai_tik', 'Nilai TIK'), 0, float),
+    ('minat_sains', ('minat_sains', 'Minat Sains'), 0, int),
+    ('minat_bahasa', ('minat_bahasa', 'Minat Bahasa'), 0, int),
+    ('minat_sosial', ('minat_sosial', 'Minat Sosial'), 0, int),
+    ('minat_teknologi', ('minat_teknologi', 'Minat Teknologi'), 0, int),
+    ('potensi_asli', ('potensi_asli', 'Potensi', 'Potensi Asli'), None, str),
+    ('potensi_prediksi', ('potensi_prediksi', 'Potensi Prediksi'), '-', str),
+]
+BATCH_CHUNK = 5000  # baris per executemany untuk frame yang sangat besar
+
+# Kunci alami siswa: baris dengan nilai kolom ini sama dianggap siswa yang sama
+KOLOM_KUNCI = [
+    'nama', 'jenis_kelamin', 'usia', 'nilai_mtk', 'nilai_ipa', 'nilai_ips', 'nilai_bindo',
+    'nilai_bing', 'nilai_tik', 'minat_sains', 'minat_bahasa', 'minat_sosial', 'minat_teknologi'
+]
+HASH_PANJANG = 20   # karakter hex sha1 yang disimpan (80 bit)
+
+@terukur('db.simpan_siswa', lambda hasil, data_dict: 1)
 def simpan_data_siswa(data_dict):
-    sumber = data_dict.get('sumber', 'individu')
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-    INSERT INTO DataSiswa (
-        nama, jenis_kelamin, usia, nilai_mtk, nilai_ipa, nilai_ips, nilai_bindo, nilai_bing, nilai_tik,
-        minat_sains, minat_bahasa, minat_sosial, minat_teknologi,
-        potensi_asli, potensi_prediksi, sumber, waktu_input
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now','localtime'))
-    """, (
-        data_dict.get('nama', '-'),
-        data_dict.get('jenis_kelamin', '-'),
-        int(data_dict.get('usia', 0) or 0),
-        float(data_dict.get('nilai_mtk', 0) or 0.0),
-        float(data_dict.get('nilai_ipa', 0) or 0.0),
-        float(data_dict.get('nilai_ips', 0) or 0.0),
-        float(data_dict.get('nilai_bindo', 0) or 0.0),
-        float(data_dict.get('nilai_bing', 0) or 0.0),
-        float(data_dict.get('nilai_tik', 0) or 0.0),
-        int(data_dict.get('minat_sains', 0) or 0),
-        int(data_dict.get('minat_bahasa', 0) or 0),
-        int(data_dict.get('minat_sosial', 0) or 0),
-        int(data_dict.get('minat_teknologi', 0) or 0),
-        data_dict.get('potensi_asli'),
-        data_dict.get('potensi_prediksi', '-'),
-        sumber
-    ))
-    conn.commit()
-    conn.close()
+    """Simpan satu siswa (upsert seperti simpan_data_batch); mengembalikan laporan yang sama."""
+    return simpan_data_batch(pd.DataFrame([data_dict]), data_dict.get('sumber', 'individu'))
+
+def normalisasi_batch(df, sumber="batch"):
+    """
+    Normalisasi kolom snake_case / Title Case untuk seluruh frame sekaligus:
+    nilai non-kosong pertama dari alias kolom, lalu default.
+    """
+    out = pd.DataFrame(index=df.index)
+    for kolom, alias, default, tipe in BATCH_KOLOM:
+        ser = None
+        for a in alias:
+            if a in df.columns:
+                ser = df[a] if ser is None else ser.combine_first(df[a])
+        if ser is None:
+            ser = pd.Series(default, index=df.index, dtype=object)
+        if tipe is str:
+            ser = ser.astype(object).where(ser.notna(), default)
+        else:
+            ser = pd.to_numeric(ser, errors='coerce').fillna(0).astype(tipe)
+        out[kolom] = ser
+    out['sumber'] = sumber
+    return out
 
+def hash_konten(df_norm):
+    """Hash stabil kunci alami (KOLOM_KUNCI) per baris hasil normalisasi_batch."""
+    teks = (
+        df_norm['nama'].astype(str).str.strip().str.lower() + '|'
+        + df_norm['jenis_kelamin'].astype(str).str.strip().str.upper() + '|'
+    ).tolist()
+    # kolom angka sebagai float64 little-endian: 8 byte per kolom, tanpa format teks per sel
+    angka = np.ascontiguousarray(df_norm[KOLOM_KUNCI[2:]].to_numpy(dtype='<f8')) + 0.0   # -0.0 -> 0.0
+    lebar = angka.shape[1] * 8
+    mentah = angka.tobytes()
+    return [
+        hashlib.sha1(t.encode('utf-8') + mentah[i * lebar:(i + 1) * lebar]).hexdigest()[:HASH_PANJANG]
+        for i, t in enumerate(teks)
+    ]
+
+def _baris_batch(df_norm):
+    # tolist() -> skalar Python (sqlite3 tidak menerima tipe numpy)
+    return list(zip(*[df_norm[c].tolist() for c in df_norm.columns]))
+
+@terukur('db.simpan_batch', lambda hasil, *a, **k: hasil['total'])
 def simpan_data_batch(df, sumber="batch"):
+    """
+    Upsert seluruh baris df dalam satu transaksi (ON CONFLICT hash_konten).
+    Mengembalikan laporan {'total', 'baru', 'diperbarui', 'dilewati'}.
+    """
+    laporan = {'total': 0, 'baru': 0, 'diperbarui': 0, 'dilewati': 0}
     # Terima df dengan snake_case ATAU Title Case
-    for _, row in df.iterrows():
-        r = row if isinstance(row, pd.Series) else pd.Series(row)
-        data_dict = {
-            'nama': _pick(r, 'nama', 'Nama', default='-'),
-            'jenis_kelamin': _pick(r, 'jenis_kelamin', 'Jenis Kelamin', default='-'),
-            'usia': _pick(r, 'usia', 'Usia', default=0),
-            'nilai_mtk': _pick(r, 'nilai_mtk', 'Nilai Matematika', default=0),
-            'nilai_ipa': _pick(r, 'nilai_ipa', 'Nilai IPA', default=0),
-            'nilai_ips': _pick(r, 'nilai_ips', 'Nilai IPS', default=0),
-            'nilai_bindo': _pick(r, 'nilai_bindo', 'Nilai Bahasa Indonesia', default=0),
-            'nilai_bing': _pick(r, 'nilai_bing', 'Nilai Bahasa Inggris', default=0),
-            'nilai_tik': _pick(r, 'nilai_tik', 'Nilai TIK', default=0),
-            'minat_sains': _pick(r, 'minat_sains', 'Minat Sains', default=0),
-            'minat_bahasa': _pick(r, 'minat_bahasa', 'Minat Bahasa', default=0),
-            'minat_sosial': _pick(r, 'minat_sosial', 'Minat Sosial', default=0),
-            'minat_teknologi': _pick(r, 'minat_teknologi', 'Minat Teknologi', default=0),
-            'potensi_asli': _pick(r, 'potensi_asli', 'Potensi', 'Potensi Asli', default=None),
-            'potensi_prediksi': _pick(r, 'potensi_prediksi', 'Potensi Prediksi', default='-'),
-            'sumber': sumber
-        }
-        simpan_data_siswa(data_dict)
+    if df is None or df.empty:
+        return laporan
+    df_norm = normalisasi_batch(df, sumber)
+    df_norm['hash_konten'] = hash_konten(df_norm)
+    with koneksi_db() as conn:
+        # kunci tulis SEBELUM membaca MAX(id): penulis lain tidak boleh menyisip di antaranya
+        conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        id_awal = conn.execute("SELECT COALESCE(MAX(id), 0) FROM DataSiswa").fetchone()[0]
+        # rowcount (sqlite3_changes) tidak ikut menghitung perubahan oleh trigger ringkasan
+        berubah = 0
+        for start in range(0, len(df_norm), BATCH_CHUNK):
+            berubah += conn.executemany(INSERT_SQL, _baris_batch(df_norm.iloc[start:start + BATCH_CHUNK])).rowcount
+        baru = conn.execute("SELECT COUNT(*) FROM DataSiswa WHERE id > ?", (id_awal,)).fetchone()[0]
+        # Baris lama berubah label -> data tidak lagi append-only (cache & model perlu muat ulang)
+        if berubah > baru:
+            _naikkan_generasi(conn)
+    laporan.update(total=len(df_norm), baru=baru, diperbarui=berubah - baru, dilewati=len(df_norm) - berubah)
+    return laporan
 
-def ambil_semua_data():
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("SELECT * FROM DataSiswa", conn)
-    conn.close()
+def _naikkan_generasi(conn):
+    conn.execute("UPDATE MetaData SET nilai = nilai + 1 WHERE kunci = 'generasi'")
+
+def versi_data():
+    """Versi data saat ini: (generasi, jumlah baris, id terakhir)."""
+    with koneksi_db() as conn:
+        row = conn.execute("SELECT nilai FROM MetaData WHERE kunci = 'generasi'").fetchone()
+        jumlah, max_id = conn.execute("SELECT COUNT(*), MAX(id) FROM DataSiswa").fetchone()
+    return (row[0] if row else 0), jumlah, max_id or 0
+
+def kompak_angka(ser):
+    """Series numerik kompak tanpa kehilangan nilai: bulat -> int8/16/..., pecahan tetap float64."""
+    ser = pd.to_numeric(ser, errors='coerce')
+    # kolom REAL berisi bilangan bulat (85.0) -> integer
+    if ser.dtype.kind == 'f' and not ser.isna().any() and (ser == np.floor(ser)).all():
+        ser = ser.astype(np.int64)
+    if ser.dtype.kind in 'iu':
+        return pd.to_numeric(ser, downcast='integer')
+    # pecahan tidak diturunkan ke float32 (92.3 -> 92.30000305...): hash_konten & dedup
+    # harus melihat nilai yang sama dengan yang disimpan simpan_data_siswa
+    return ser.astype(np.float64)
+
+def kompakkan_df(df):
+    """Padatkan frame DataSiswa (milik pemanggil) di tempat: category & angka kompak."""
+    for col in KOLOM_ANGKA:
+        if col in df.columns:
+            df[col] = kompak_angka(df[col])
+    for col in KOLOM_KATEGORI:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
     return df
 
-def backup_db():
-    with open(DB_PATH, "rb") as f:
-        return f.read()
+def gabung_frame(frames):
+    """pd.concat yang mempertahankan dtype category (kategori disatukan dulu)."""
+    frames = [f.copy(deep=False) for f in frames]     # salinan dangkal: data tidak disalin
+    for col in KOLOM_KATEGORI:
+        if frames and all(col in f.columns and isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames):
+            kategori = frames[0][col].cat.categories
+            for f in frames[1:]:
+                kategori = kategori.union(f[col].cat.categories)
+            for f in frames:
+                f[col] = f[col].cat.set_categories(kategori)
+    return pd.concat(frames, ignore_index=True)
+
+@terukur('db.ambil_semua', lambda hasil: len(hasil))
+def ambil_semua_data():
+    """
+    Seluruh DataSiswa dari cache memori. Bila tabel hanya bertambah, yang dibaca
+    dari DB cuma baris id > id terakhir; muat ulang penuh setelah penghapusan.
+    Kolom dipadatkan (lihat kompakkan_df), dibaca per chunk agar puncak memori kecil.
+    DataFrame hasil dipakai bersama antar pemanggil: jangan diubah in-place.
+    """
+    versi = versi_data()
+    generasi, jumlah, max_id = versi
+    with _DATA_LOCK:
+        cache = _DATA_CACHE.get(DB_PATH)
+        if cache is not None and cache['versi'] == versi:
+            return cache['df']
+
+        df = None
+        if cache is not None:
+            gen_lama, jumlah_lama, max_id_lama = cache['versi']
+            if gen_lama == generasi and max_id > max_id_lama and jumlah > jumlah_lama:
+                df_baru = ambil_data_sejak(max_id_lama)
+                if jumlah_lama + len(df_baru) == jumlah:
+                    # frame kosong (mis. setelah diarsipkan) bertipe object: jangan ikut digabung
+                    df = gabung_frame([cache['df'], df_baru]) if jumlah_lama else df_baru
+                    versi = (generasi, jumlah, int(df_baru['id'].max()))
+        if df is None:
+            with koneksi_db() as conn:
+                df = gabung_frame([
+                    kompakkan_df(chunk) for chunk in pd.read_sql_query(
+                        SELECT_DATA + " ORDER BY id", conn, chunksize=BACA_CHUNK
+                    )
+                ])
+            versi = (generasi, len(df), int(df['id'].max()) if not df.empty else 0)
+
+        _DATA_CACHE[DB_PATH] = {'versi': versi, 'df': df}
+        return df
+
+def statistik_data_latih():
+    """Jumlah baris berlabel, id terakhir, waktu_input terakhir, dan generasi data."""
+    with koneksi_db() as conn:
+        jumlah, max_id, max_waktu, generasi = conn.execute("""
+        SELECT COUNT(*), MAX(id), MAX(waktu_input),
+            (SELECT nilai FROM MetaData WHERE kunci = 'generasi')
+        FROM DataSiswa
+        WHERE potensi_asli IS NOT NULL AND potensi_asli NOT IN ('', '-')
+        """).fetchone()
+    return jumlah, max_id or 0, max_waktu or '', generasi or 0
+
+def fingerprint_data():
+    """Sidik jari data latih: jumlah baris berlabel, id & waktu_input terakhir, generasi."""
+    return "-".join(str(v) for v in statistik_data_latih())
+
+@terukur('db.ambil_sejak', lambda hasil, last_id: len(hasil))
+def ambil_data_sejak(last_id):
+    """Ambil baris dengan id > last_id (data yang masuk setelah pelatihan terakhir)."""
+    with koneksi_db() as conn:
+        return kompakkan_df(pd.read_sql_query(
+            SELECT_DATA + " WHERE id > ? ORDER BY id", conn, params=(int(last_id),)
+        ))
+
+# Fungsi dashboard di bawah membaca partisi aktif; lintas_partisi=True
+# menyertakan seluruh arsip tahun ajaran sebelumnya (opt-in)
+
+def jumlah_data(lintas_partisi=False):
+    with koneksi_db() as conn:
+        jumlah = conn.execute("SELECT COUNT(*) FROM DataSiswa").fetchone()[0]
+    if lintas_partisi:
+        jumlah += sum(p['jumlah'] for p in daftar_partisi())
+    return jumlah
+
+def _hitung_per(kolom, lintas_partisi=False):
+    # kolom berasal dari daftar tetap di modul ini, bukan input pengguna
+    sql = f"""
+    SELECT {kolom}, COUNT(*) AS jumlah FROM DataSiswa
+    WHERE {kolom} IS NOT NULL
+    GROUP BY {kolom} ORDER BY jumlah DESC, {kolom}
+    """
+    if lintas_partisi:
+        df = _baca_lintas(sql).groupby(kolom, as_index=False)['jumlah'].sum()
+        df = df.sort_values(['jumlah', kolom], ascending=[False, True])
+    else:
+        with koneksi_db() as conn:
+            df = pd.read_sql_query(sql, conn)
+    return df.set_index(kolom)['jumlah']
+
+def hitung_potensi_prediksi(lintas_partisi=False):
+    """Jumlah siswa per potensi_prediksi (Series, urut menurun)."""
+    return _hitung_per('potensi_prediksi', lintas_partisi)
+
+def hitung_potensi_asli(lintas_partisi=False):
+    """Jumlah siswa per potensi_asli (Series, urut menurun), dari ringkasan confusion."""
+    df = hitung_confusion(lintas_partisi).groupby('potensi_asli')['jumlah'].sum()
+    df = df.reset_index().sort_values(['jumlah', 'potensi_asli'], ascending=[False, True])
+    return df.set_index('potensi_asli')['jumlah']
+
+def hitung_per_sumber(lintas_partisi=False):
+    """Jumlah siswa per sumber input (individu/batch)."""
+    return _hitung_per('sumber', lintas_partisi)
+
+def hitung_confusion(lintas_partisi=False):
+    """
+    Pasangan (potensi_asli, potensi_prediksi) beserta jumlahnya, untuk data berlabel.
+    Dibaca dari RingkasanConfusion: O(kelas^2), tidak bergantung jumlah siswa.
+    """
+    sql = """
+    SELECT potensi_asli, NULLIF(potensi_prediksi, '') AS potensi_prediksi, jumlah
+    FROM RingkasanConfusion
+    """
+    if lintas_partisi:
+        # arsip tanpa RingkasanConfusion (dibuat sebelum tabel ini ada) dihitung dengan GROUP BY
+        sql_cadangan = """
+        SELECT potensi_asli, potensi_prediksi, COUNT(*) AS jumlah FROM DataSiswa
+        WHERE potensi_asli IS NOT NULL
+        GROUP BY potensi_asli, potensi_prediksi
+        """
+        return _baca_lintas(sql, sql_cadangan=sql_cadangan).groupby(
+            ['potensi_asli', 'potensi_prediksi'], as_index=False, dropna=False
+        )['jumlah'].sum()
+    with koneksi_db() as conn:
+        return pd.read_sql_query(sql, conn)
+
+@terukur('db.ambil_halaman', lambda hasil, *a, **k: len(hasil))
+def ambil_data_halaman(offset=0, limit=500, lintas_partisi=False):
+    """
+    Satu halaman baris DataSiswa (urut id) untuk ditampilkan di tabel. Dengan
+    lintas_partisi, arsip (tahun lama dulu) diikuti partisi aktif, plus kolom 'partisi'.
+    """
+    sql = SELECT_DATA + " ORDER BY id LIMIT ? OFFSET ?"
+    if not lintas_partisi:
+        with koneksi_db() as conn:
+            return pd.read_sql_query(sql, conn, params=(int(limit), int(offset)))
+    frames = []
+    partisi = daftar_partisi() + [{'nama': 'aktif', 'path': None, 'jumlah': jumlah_data()}]
+    for p in partisi:
+        if limit <= 0:
+            break
+        if offset >= p['jumlah']:
+            offset -= p['jumlah']
+            continue
+        if p['path'] is None:
+            with koneksi_db() as conn:
+                df = pd.read_sql_query(sql, conn, params=(int(limit), int(offset)))
+        else:
+            conn = _koneksi_arsip(p['path'])
+            try:
+                df = pd.read_sql_query(sql, conn, params=(int(limit), int(offset)))
+            finally:
+                conn.close()
+        frames.append(df.assign(partisi=p['nama']))
+        limit -= len(df)
+        offset = 0
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+@terukur('db.backup')
+def buat_backup(kompres=True):
+    """
+    Snapshot konsisten DB memakai sqlite3.Connection.backup (bertahap per
+    BACKUP_PAGES halaman, aman meski ada insert berjalan). Bila kompres=True,
+    snapshot di-gzip secara streaming. Mengembalikan path file backup.
+    """
+    if not os.path.exists(BACKUP_FOLDER):
+        os.makedirs(BACKUP_FOLDER)
+    nama = "data_siswa_" + datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    tmp_path = os.path.join(BACKUP_FOLDER, nama + ".db.tmp")
+
+    dst = sqlite3.connect(tmp_path)
+    try:
+        with koneksi_db() as src:
+            src.backup(dst, pages=BACKUP_PAGES)
+    finally:
+        dst.close()
+
+    if kompres:
+        path = os.path.join(BACKUP_FOLDER, nama + ".db.gz")
+        with open(tmp_path, "rb") as fi, gzip.open(path + ".tmp", "wb") as fo:
+            shutil.copyfileobj(fi, fo, BACKUP_BUFFER)
+        os.replace(path + ".tmp", path)
+        os.remove(tmp_path)
+    else:
+        path = os.path.join(BACKUP_FOLDER, nama + ".db")
+        os.replace(tmp_path, path)
+    _terapkan_retensi_backup()
+    return path
+
+def daftar_backup():
+    """Snapshot lokal (terbaru dulu): list dict nama, path, ukuran, waktu."""
+    if not os.path.exists(BACKUP_FOLDER):
+        return []
+    hasil = []
+    for f in os.listdir(BACKUP_FOLDER):
+        if f.startswith("data_siswa_") and f.endswith((".db", ".db.gz")):
+            path = os.path.join(BACKUP_FOLDER, f)
+            info = os.stat(path)
+            hasil.append({
+                'nama': f, 'path': path, 'ukuran': info.st_size,
+                'waktu': datetime.fromtimestamp(info.st_mtime),
+            })
+    return sorted(hasil, key=lambda b: b['waktu'], reverse=True)
+
+def _terapkan_retensi_backup():
+    for lama in daftar_backup()[BACKUP_KEEP:]:
+        try:
+            os.remove(lama['path'])
+        except OSError:
+            pass
+
+def tahun_ajaran(waktu=None):
+    """Tahun awal tahun ajaran (Juli-Juni) dari waktu; default waktu sekarang."""
+    waktu = waktu or datetime.now()
+    return waktu.year if waktu.month >= BULAN_AWAL_TAHUN_AJARAN else waktu.year - 1
+
+def _path_arsip(tahun):
+    return os.path.join(ARSIP_FOLDER, f"data_siswa_{tahun}-{tahun + 1}.db")
+
+# Tahun awal tahun ajaran per baris; waktu_input kosong/tidak valid -> parameter (tahun berjalan)
+SQL_TAHUN_AJARAN = f"""(CASE
+    WHEN strftime('%Y', waktu_input) IS NULL THEN ?
+    WHEN CAST(strftime('%m', waktu_input) AS INTEGER) >= {BULAN_AWAL_TAHUN_AJARAN}
+        THEN CAST(strftime('%Y', waktu_input) AS INTEGER)
+    ELSE CAST(strftime('%Y', waktu_input) AS INTEGER) - 1
+END)"""
+
+def _koneksi_arsip(path):
+    # arsip hanya dibaca: mode read-only, tanpa pool
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=DB_TIMEOUT)
+
+def daftar_partisi():
+    """Partisi arsip (tahun ajaran lama, urut naik): list dict nama, tahun, path, ukuran, jumlah."""
+    if not os.path.exists(ARSIP_FOLDER):
+        return []
+    hasil = []
+    for f in sorted(os.listdir(ARSIP_FOLDER)):
+        if not (f.startswith("data_siswa_") and f.endswith(".db")):
+            continue
+        path = os.path.join(ARSIP_FOLDER, f)
+        tahun = int(f[len("data_siswa_"):].split("-")[0])
+        conn = _koneksi_arsip(path)
+        try:
+            jumlah = conn.execute("SELECT COUNT(*) FROM DataSiswa").fetchone()[0]
+        finally:
+            conn.close()
+        hasil.append({
+            'nama': f"{tahun}/{tahun + 1}", 'tahun': tahun, 'path': path,
+            'ukuran': os.path.getsize(path), 'jumlah': jumlah,
+        })
+    return hasil
+
+def _baca_lintas(sql, params=(), sql_cadangan=None):
+    """
+    Jalankan query baca di partisi aktif + semua arsip; hasil digabung dengan kolom
+    'partisi'. sql_cadangan dipakai untuk arsip yang tabelnya belum ada (arsip lama).
+    """
+    frames = []
+    for p in daftar_partisi():
+        conn = _koneksi_arsip(p['path'])
+        try:
+            try:
+                df = pd.read_sql_query(sql, conn, params=params)
+            except pd.errors.DatabaseError:
+                if sql_cadangan is None:
+                    raise
+                df = pd.read_sql_query(sql_cadangan, conn, params=params)
+            frames.append(df.assign(partisi=p['nama']))
+        finally:
+            conn.close()
+    with koneksi_db() as conn:
+        frames.append(pd.read_sql_query(sql, conn, params=params).assign(partisi='aktif'))
+    return pd.concat(frames, ignore_index=True)
+
+def _arsipkan_kelompok(conn, daftar_tahun, kolom_aktif, sekarang):
+    """
+    Salin baris daftar_tahun (maks. ARSIP_MAKS_TAHUN, satu ATTACH per tahun) ke arsipnya
+    lalu hapus dari partisi aktif, dalam satu transaksi. {nama tahun ajaran: jumlah baris}.
+    """
+    hasil = {}
+    alias = {tahun: f"arsip_{i}" for i, tahun in enumerate(daftar_tahun)}
+    for tahun, nama in alias.items():
+        conn.execute(f"ATTACH DATABASE ? AS {nama}", (_path_arsip(tahun),))
+    try:
+        # Tulis dikunci selama salin + hapus: tidak ada baris yang terlewat
+        conn.execute("BEGIN IMMEDIATE")
+        for tahun, nama in alias.items():
+            kolom_arsip = [row[1] for row in conn.execute(f"PRAGMA {nama}.table_info(DataSiswa)")]
+            if kolom_arsip:
+                kolom = ", ".join(k for k in kolom_arsip if k in kolom_aktif)
+                conn.execute(
+                    f"INSERT INTO {nama}.DataSiswa ({kolom}) SELECT {kolom} FROM main.DataSiswa "
+                    f"WHERE {SQL_TAHUN_AJARAN} = ? ORDER BY id", (sekarang, tahun)
+                )
+            else:
+                conn.execute(
+                    f"CREATE TABLE {nama}.DataSiswa AS SELECT * FROM main.DataSiswa "
+                    f"WHERE {SQL_TAHUN_AJARAN} = ? ORDER BY id", (sekarang, tahun)
+                )
+            conn.execute(SQL_TABEL_CONFUSION.format(skema=nama))
+            _isi_ringkasan_confusion(conn, nama)
+            hasil[f"{tahun}/{tahun + 1}"] = conn.execute(
+                f"SELECT COUNT(*) FROM main.DataSiswa WHERE {SQL_TAHUN_AJARAN} = ?", (sekarang, tahun)
+            ).fetchone()[0]
+        tanda = ", ".join("?" * len(daftar_tahun))
+        sisa = conn.execute(
+            f"SELECT EXISTS (SELECT 1 FROM main.DataSiswa WHERE {SQL_TAHUN_AJARAN} NOT IN ({tanda}))",
+            (sekarang, *daftar_tahun)
+        ).fetchone()[0]
+        if sisa:
+            # Tahun ajaran lain menyusul di kelompok berikutnya: hapus per baris,
+            # trigger ringkasan tetap aktif
+            conn.execute(
+                f"DELETE FROM main.DataSiswa WHERE {SQL_TAHUN_AJARAN} IN ({tanda})", (sekarang, *daftar_tahun)
+            )
+        else:
+            # DELETE tanpa WHERE: SQLite mengosongkan tabel tanpa menghapus per baris,
+            # hanya bila tabel tidak punya trigger -> trigger ringkasan dilepas sementara
+            _hapus_trigger_confusion(conn)
+            conn.execute("DELETE FROM main.DataSiswa")
+            conn.execute("DELETE FROM main.RingkasanConfusion")
+            _buat_trigger_confusion(conn)
+        _naikkan_generasi(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        for nama in alias.values():
+            conn.execute(f"DETACH DATABASE {nama}")
+    return hasil
+
+@terukur('db.arsip', lambda hasil: sum(hasil.values()))
+def arsipkan_partisi_aktif():
+    """
+    Pindahkan seluruh baris partisi aktif ke file arsip per tahun ajaran (ditambahkan
+    bila arsip tahun itu sudah ada) dan kosongkan tabel aktif, per kelompok
+    ARSIP_MAKS_TAHUN tahun ajaran (batas ATTACH SQLite), lalu VACUUM hanya DB aktif.
+    Mengembalikan {nama tahun ajaran: jumlah baris}.
+    """
+    if not os.path.exists(ARSIP_FOLDER):
+        os.makedirs(ARSIP_FOLDER)
+    sekarang = tahun_ajaran()
+    hasil = {}
+    with koneksi_db() as conn:
+        conn.commit()
+        kolom_aktif = [row[1] for row in conn.execute("PRAGMA main.table_info(DataSiswa)")]
+        # Diulang sampai kosong: baris yang masuk di antara dua kelompok ikut terarsip
+        while True:
+            daftar_tahun = [row[0] for row in conn.execute(
+                f"SELECT DISTINCT {SQL_TAHUN_AJARAN} AS tahun FROM DataSiswa ORDER BY tahun", (sekarang,)
+            )]
+            if not daftar_tahun:
+                break
+            kelompok = _arsipkan_kelompok(conn, daftar_tahun[:ARSIP_MAKS_TAHUN], kolom_aktif, sekarang)
+            for nama, jumlah in kelompok.items():
+                hasil[nama] = hasil.get(nama, 0) + jumlah
+        # File aktif dipadatkan kembali; arsip tidak disentuh
+        conn.execute("VACUUM main")
+    return hasil
 
 def kosongkan_database():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("DELETE FROM DataSiswa")
-    conn.commit()
-    conn.close()
+    """Kosongkan partisi aktif dengan mengarsipkannya (lihat arsipkan_partisi_aktif)."""
+    return arsipkan_partisi_aktif()
@@ -0,0 +1,265 @@
+import os
+import json
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
+from utils import db_utils
+from utils.db_utils import SELECT_DATA, koneksi_db, versi_data, statistik_data_latih, ambil_data_sejak
+from utils.model_utils import FTR, preprocess_df, filter_berlabel
+from utils.perf_utils import terukur
+
+# Snapshot kolumnar matriks latih (hasil preprocess_df) dalam file biner mentah
+# yang dibaca lewat np.memmap (zero-copy). Baris baru cukup di-append; bangun
+# ulang menulis file baru lalu os.replace (meta['versi'] naik), sehingga memmap
+# yang masih dipegang proses lain tetap membaca inode lama yang utuh.
+FITUR_FOLDER = os.path.join(db_utils.DB_FOLDER, 'fitur')
+FITUR_CHUNK = 50000     # baris per chunk saat membangun ulang dari SQLite
+
+# Reservoir sampling seimbang per kelas (Algorithm R), diperbarui setiap baris
+# berlabel baru masuk snapshot: maksimal RESERVOIR_PER_KELAS posisi baris per kelas
+RESERVOIR_PER_KELAS = 20000
+RESERVOIR_SEED = 2024
+
+# Nama file kolom -> dtype (X berbentuk (n, len(FTR)))
+_KOLOM = {
+    'X': np.float32,        # fitur FTR
+    'y': np.int16,          # kode label -> meta['labels']
+    'id': np.int64,         # id DataSiswa
+    'waktu': np.int64,      # waktu_input (detik epoch, 0 bila kosong)
+}
+_LOCK = threading.Lock()
+
+@contextmanager
+def _kunci():
+    """
+    Kunci eksklusif snapshot: _LOCK antar-thread + file FITUR_FOLDER/.lock antar-proses
+    (aplikasi & prediksi_batch.py bisa menyinkronkan db/fitur bersamaan).
+    """
+    with _LOCK:
+        os.makedirs(FITUR_FOLDER, exist_ok=True)
+        with open(os.path.join(FITUR_FOLDER, ".lock"), "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:     # LK_LOCK menyerah setelah ~10 detik
+                        pass
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _path(nama):
+    return os.path.join(FITUR_FOLDER, f"{nama}.bin")
+
+def _baca_meta():
+    try:
+        with open(os.path.join(FITUR_FOLDER, "meta.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _tulis_meta(meta):
+    path = os.path.join(FITUR_FOLDER, "meta.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(path + ".tmp", path)
+
+def _lebar(nama):
+    return len(FTR) if nama == 'X' else 1
+
+def _potong(meta):
+    # Buang sisa append yang tidak sempat tercatat di meta (mis. proses terhenti)
+    for nama, dtype in _KOLOM.items():
+        ukuran = meta['n'] * _lebar(nama) * np.dtype(dtype).itemsize
+        with open(_path(nama), "ab") as f:
+            f.truncate(ukuran)
+
+def _kolom_dari_df(df, meta):
+    """Ubah baris DataSiswa berlabel menjadi array kolom; label baru ditambahkan ke meta."""
+    df = preprocess_df(df)
+    kode_label = {label: i for i, label in enumerate(meta['labels'])}
+    for label in pd.unique(df['potensi_asli']):
+        if label not in kode_label:
+            kode_label[label] = len(meta['labels'])
+            meta['labels'].append(label)
+    waktu = pd.to_datetime(df['waktu_input'], errors='coerce').to_numpy(dtype='datetime64[s]')
+    return {
+        'X': df[FTR].to_numpy(dtype=np.float32),
+        'y': df['potensi_asli'].map(kode_label).to_numpy(dtype=np.int16),
+        'id': df['id'].to_numpy(dtype=np.int64),
+        'waktu': np.where(np.isnat(waktu), 0, waktu.astype(np.int64)),
+    }
+
+def _reservoir_kosong():
+    return {'total': 0, 'n': np.zeros(0, dtype=np.int64),
+            'idx': np.full((0, RESERVOIR_PER_KELAS), -1, dtype=np.int64)}
+
+def _baca_reservoir(meta):
+    try:
+        with np.load(os.path.join(FITUR_FOLDER, "reservoir.npz")) as f:
+            res = {'total': int(f['total']), 'n': f['n'], 'idx': f['idx']}
+            versi = int(f['versi'])
+    except (OSError, ValueError, KeyError):
+        return None
+    # reservoir harus sinkron dengan versi & jumlah baris di meta
+    if (versi != meta.get('versi', 0) or res['total'] != meta['n']
+            or res['idx'].shape[1] != RESERVOIR_PER_KELAS):
+        return None
+    return res
+
+def _tulis_reservoir(res, meta):
+    path = os.path.join(FITUR_FOLDER, "reservoir.npz")
+    with open(path + ".tmp", "wb") as f:
+        np.savez(f, total=res['total'], n=res['n'], idx=res['idx'], versi=meta.get('versi', 0))
+    os.replace(path + ".tmp", path)
+
+def _perbarui_reservoir(res, y_baru):
+    """Algorithm R per kelas untuk baris baru berkode y_baru (posisi res['total'] dst.)."""
+    awal = res['total']
+    n_kelas = int(y_baru.max()) + 1 if len(y_baru) else 0
+    if n_kelas > len(res['n']):
+        tambah = n_kelas - len(res['n'])
+        res['n'] = np.concatenate([res['n'], np.zeros(tambah, dtype=np.int64)])
+        res['idx'] = np.vstack([res['idx'], np.full((tambah, RESERVOIR_PER_KELAS), -1, dtype=np.int64)])
+    rng = np.random.default_rng([RESERVOIR_SEED, awal])
+    k = RESERVOIR_PER_KELAS
+    for kelas in np.unique(y_baru):
+        posisi = awal + np.flatnonzero(y_baru == kelas)
+        terlihat = int(res['n'][kelas])
+        isi = res['idx'][kelas]
+        # slot kosong diisi langsung
+        n_isi = max(0, min(k - terlihat, len(posisi)))
+        isi[terlihat:terlihat + n_isi] = posisi[:n_isi]
+        sisa = posisi[n_isi:]
+        if len(sisa):
+            # item ke-t menggantikan slot acak j < k dengan peluang k/t
+            t = terlihat + n_isi + np.arange(1, len(sisa) + 1)
+            j = (rng.random(len(sisa)) * t).astype(np.int64)
+            ganti = j < k
+            for slot, pos in zip(j[ganti].tolist(), sisa[ganti].tolist()):
+                isi[slot] = pos
+        res['n'][kelas] = terlihat + len(posisi)
+    res['total'] = awal + len(y_baru)
+    return res
+
+def _append(kolom, akhiran=""):
+    for nama, arr in kolom.items():
+        with open(_path(nama) + akhiran, "ab") as f:
+            f.write(np.ascontiguousarray(arr, dtype=_KOLOM[nama]).tobytes())
+
+def _bangun_ulang(generasi, versi):
+    # dipanggil dengan _kunci() dipegang; file lama tidak pernah dipotong di tempat
+    meta = {'db_path': db_utils.DB_PATH, 'generasi': generasi, 'n': 0, 'last_id': 0,
+            'labels': [], 'ftr': FTR, 'versi': versi}
+    for nama in _KOLOM:
+        open(_path(nama) + ".tmp", "wb").close()
+    res = _reservoir_kosong()
+    with koneksi_db() as conn:
+        max_id = conn.execute("SELECT MAX(id) FROM DataSiswa").fetchone()[0] or 0
+        for df in pd.read_sql_query(
+            SELECT_DATA + """
+            WHERE id <= ? AND potensi_asli IS NOT NULL AND potensi_asli NOT IN ('', '-')
+            ORDER BY id""", conn, params=(max_id,), chunksize=FITUR_CHUNK
+        ):
+            kolom = _kolom_dari_df(df, meta)
+            _append(kolom, ".tmp")
+            _perbarui_reservoir(res, kolom['y'])
+            meta['n'] += len(df)
+    meta['last_id'] = int(max_id)
+    for nama in _KOLOM:
+        os.replace(_path(nama) + ".tmp", _path(nama))
+    _tulis_reservoir(res, meta)
+    _tulis_meta(meta)
+    return meta
+
+@terukur('fitur.sinkron', lambda hasil: hasil['n'])
+def sinkronkan_fitur():
+    """
+    Samakan snapshot dengan DB: append baris berlabel baru (id > last_id) bila
+    tabel hanya bertambah; bangun ulang bila ada penghapusan / generasi berubah.
+    """
+    with _kunci():
+        return _sinkronkan()
+
+def _sinkronkan():
+    # dipanggil dengan _kunci() dipegang
+    generasi = versi_data()[0]
+    jumlah = statistik_data_latih()[0]
+    meta = _baca_meta()
+    versi_baru = (meta.get('versi', 0) if meta is not None else 0) + 1
+    if (meta is None or meta.get('db_path') != db_utils.DB_PATH or meta.get('ftr') != FTR
+            or meta['generasi'] != generasi or meta['n'] > jumlah):
+        return _bangun_ulang(generasi, versi_baru)
+    if meta['n'] == jumlah:
+        return meta
+
+    df_semua = ambil_data_sejak(meta['last_id'])
+    df_baru = filter_berlabel(df_semua)
+    if meta['n'] + len(df_baru) != jumlah:
+        return _bangun_ulang(generasi, versi_baru)
+    # append: baris lama tidak berubah, memmap pembaca lain (n lama) tetap valid
+    res = _baca_reservoir(meta)
+    _potong(meta)
+    kolom = _kolom_dari_df(df_baru, meta)
+    _append(kolom)
+    if res is None:
+        res = _perbarui_reservoir(_reservoir_kosong(), _memmap('y', dict(meta, n=meta['n'] + len(df_baru))))
+    else:
+        _perbarui_reservoir(res, kolom['y'])
+    meta['n'] += len(df_baru)
+    meta['last_id'] = int(df_semua['id'].max())
+    _tulis_reservoir(res, meta)
+    _tulis_meta(meta)
+    return meta
+
+def _memmap(nama, meta):
+    dtype = _KOLOM[nama]
+    if meta['n'] == 0:
+        return np.empty((0, len(FTR)) if nama == 'X' else 0, dtype=dtype)
+    shape = (meta['n'], len(FTR)) if nama == 'X' else (meta['n'],)
+    return np.memmap(_path(nama), dtype=dtype, mode='r', shape=shape)
+
+def muat_kolom(meta=None):
+    """
+    Semua kolom snapshot sebagai memmap read-only: dict X, y, id, waktu + meta.
+    Dipetakan di bawah kunci yang sama dengan sinkronisasi; meta yang sudah usang
+    (versi lain) diganti meta terbaru.
+    """
+    with _kunci():
+        if meta is None or meta.get('versi') != (_baca_meta() or {}).get('versi'):
+            meta = _sinkronkan()
+        return {nama: _memmap(nama, meta) for nama in _KOLOM}, meta
+
+def muat_reservoir(meta=None, y=None):
+    """
+    Posisi baris (urut) dalam reservoir seimbang per kelas; dihitung ulang bila tidak sinkron.
+    y: kolom y dari muat_kolom yang menghasilkan meta (dibaca ulang bila tidak diberikan).
+    """
+    if meta is None or y is None:
+        kolom, meta = muat_kolom(meta)
+        y = kolom['y']
+    with _kunci():
+        res = _baca_reservoir(meta)
+        if res is None:
+            res = _perbarui_reservoir(_reservoir_kosong(), np.asarray(y))
+            # hanya ditulis bila snapshot di disk masih versi yang sama dengan y
+            if meta['n'] > 0 and _baca_meta() == meta:
+                _tulis_reservoir(res, meta)
+    idx = res['idx'].ravel()
+    return np.sort(idx[idx >= 0])
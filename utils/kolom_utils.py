@@ -0,0 +1,22 @@
+# Nama kolom tampilan untuk tabel hasil (layar, CSV unduhan, PDF). Sengaja tanpa
+# import berat agar pipeline batch tidak ikut memuat fpdf / matplotlib.
+COLUMN_MAP = {
+    'nama': 'Nama',
+    'jenis_kelamin': 'JK',
+    'usia': 'Usia',
+    'nilai_mtk': 'Matematika',
+    'nilai_ipa': 'IPA',
+    'nilai_ips': 'IPS',
+    'nilai_bindo': 'Bahasa Indonesia',
+    'nilai_bing': 'Bahasa Inggris',
+    'nilai_tik': 'TIK',
+    'minat_sains': 'Minat Sains',
+    'minat_bahasa': 'Minat Bahasa',
+    'minat_sosial': 'Minat Sosial',
+    'minat_teknologi': 'Minat Teknologi',
+    'potensi_asli': 'Potensi Asli',
+    'potensi_prediksi': 'Potensi Prediksi'
+}
+
+def map_columns(df, colmap=COLUMN_MAP):
+    return df.rename(columns={k: v for k, v in colmap.items() if k in df.columns})
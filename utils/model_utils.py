@@ -1,11 +1,54 @@
+import os
+import pickle
+import math
+import copy
+import hashlib
+import threading
+import time
 import numpy as np
 import pandas as pd
-from collections import Counter
+from collections import Counter, OrderedDict
+from datetime import datetime
+from scipy.special import expit
 from sklearn.model_selection import train_test_split
 from sklearn.neural_network import MLPClassifier
 from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.metrics import accuracy_score
 
+from utils.db_utils import (
+    ambil_data_sejak, statistik_data_latih, kompak_angka, KOLOM_ANGKA,
+    tahun_ajaran, BULAN_AWAL_TAHUN_AJARAN
+)
+from utils.perf_utils import terukur
+
+# Folder registry model (relatif dari root project)
+MODEL_FOLDER = 'models'
+MODEL_KEEP = 5          # jumlah file model terakhir yang disimpan di disk
+SAMPLE_CSV = 'data/data_siswa_smp.csv'
+
+# Pelatihan inkremental (partial_fit) + latih penuh berkala sebagai pengaman
+INCREMENTAL_EPOCHS = 5      # jumlah pass partial_fit atas baris baru
+FULL_RETRAIN_EVERY = 20     # maksimum update inkremental sebelum latih penuh
+FULL_RETRAIN_RATIO = 0.2    # latih penuh bila baris baru > 20% data latih
+PREDIKSI_CACHE_MAKS = 65536     # entri cache prediksi (LRU) per model aktif
+
+# Strategi pemilihan data latih untuk latih penuh (lihat pilih_sampel_latih):
+#   'semua'      : seluruh baris berlabel
+#   'stratified' : sampel acak maksimal LATIH_MAKS_PER_KELAS baris per potensi_asli
+#   'jendela'    : hanya baris dari LATIH_JENDELA_TAHUN tahun ajaran terakhir (waktu_input)
+#   'reservoir'  : reservoir seimbang per kelas yang diperbarui saat data masuk (feature store)
+STRATEGI_LATIH = ('semua', 'stratified', 'jendela', 'reservoir')
+LATIH_STRATEGI = os.environ.get('LATIH_STRATEGI', 'semua')
+LATIH_MAKS_PER_KELAS = 20000
+LATIH_JENDELA_TAHUN = 3
+LATIH_SEED = 42
+
+# Model aktif di memori proses. Diganti dengan satu assignment (atomic), jadi
+# pembaca selalu melihat model lama atau model baru yang sudah lengkap.
+_MODEL_AKTIF = None
+# Hanya satu proses latih/update dalam satu waktu
+_LATIH_LOCK = threading.Lock()
+
 # Fitur input yang digunakan model
 FTR = [
     'Jenis_Kelamin_enc', 'usia', 'nilai_mtk', 'nilai_ipa', 'nilai_ips',
@@ -13,52 +56,79 @@ FTR = [
     'minat_sains', 'minat_bahasa', 'minat_sosial', 'minat_teknologi'
 ]
 
+# Nama kolom CSV (Title Case) -> kolom internal (snake_case)
+RENAME_MAP = {
+    "Nilai Matematika": "nilai_mtk", "Nilai IPA": "nilai_ipa", "Nilai IPS": "nilai_ips",
+    "Nilai Bahasa Indonesia": "nilai_bindo", "Nilai Bahasa Inggris": "nilai_bing", "Nilai TIK": "nilai_tik",
+    "Minat Sains": "minat_sains", "Minat Bahasa": "minat_bahasa",
+    "Minat Sosial": "minat_sosial", "Minat Teknologi": "minat_teknologi",
+    "Jenis Kelamin": "jenis_kelamin", "Usia": "usia", "Potensi": "potensi_asli", "Nama": "nama"
+}
+
+@terukur('model.preprocess', lambda hasil, df: len(hasil))
 def preprocess_df(df):
-    """Siapkan dataframe: ubah kolom, encode jenis_kelamin, pastikan numeric."""
-    df = df.copy()
-    rename_map = {
-        "Nilai Matematika": "nilai_mtk", "Nilai IPA": "nilai_ipa", "Nilai IPS": "nilai_ips",
-        "Nilai Bahasa Indonesia": "nilai_bindo", "Nilai Bahasa Inggris": "nilai_bing", "Nilai TIK": "nilai_tik",
-        "Minat Sains": "minat_sains", "Minat Bahasa": "minat_bahasa",
-        "Minat Sosial": "minat_sosial", "Minat Teknologi": "minat_teknologi",
-        "Jenis Kelamin": "jenis_kelamin", "Usia": "usia", "Potensi": "potensi_asli", "Nama": "nama"
-    }
-    df.rename(columns=rename_map, inplace=True)
+    """
+    Siapkan dataframe: ubah kolom, encode jenis_kelamin, pastikan numeric.
+    df asli tidak diubah; hasilnya salinan dangkal, hanya kolom yang dikonversi
+    yang dibuat baru (tipe kompak: int8 untuk nilai/minat bulat, float64 untuk pecahan).
+    """
+    df = df.copy(deep=False)
+    df.rename(columns=RENAME_MAP, inplace=True)
 
-    # Encode jenis_kelamin: L=1, P=0
+    # Encode jenis_kelamin: L=1, P=0 (nilai lain / kosong = 0)
     if 'jenis_kelamin' in df.columns:
-        df['Jenis_Kelamin_enc'] = df['jenis_kelamin'].map({'L': 1, 'P': 0}).fillna(0).astype(int)
+        df['Jenis_Kelamin_enc'] = (df['jenis_kelamin'] == 'L').astype(np.int8)
     else:
-        df['Jenis_Kelamin_enc'] = 0
+        df['Jenis_Kelamin_enc'] = np.int8(0)
 
     # Pastikan kolom numerik ada & valid
-    for col in ['usia','nilai_mtk','nilai_ipa','nilai_ips','nilai_bindo','nilai_bing','nilai_tik',
-                'minat_sains','minat_bahasa','minat_sosial','minat_teknologi']:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-        else:
-            df[col] = 0
+    for col in KOLOM_ANGKA:
+        if col not in df.columns:
+            df[col] = np.int8(0)
+        elif not (df[col].dtype.kind in 'iu' and df[col].dtype.itemsize <= 2):
+            df[col] = kompak_angka(pd.to_numeric(df[col], errors='coerce').fillna(0))
     return df
 
-def train_and_predict(df):
-    """Melatih model dan menghasilkan prediksi untuk seluruh data di df."""
-    df = preprocess_df(df)
+def vektor_fitur(data):
+    """
+    Vektor fitur (tuple float, urutan FTR) dari satu dict siswa: kunci internal
+    (snake_case), Title Case CSV, atau Jenis_Kelamin_enc langsung. Berbeda dengan
+    preprocess_df, kolom yang hilang / bukan angka / NaN / tak hingga ditolak (ValueError), tidak diisi 0.
+    """
+    data = {RENAME_MAP.get(k, k): v for k, v in data.items()}
+    if 'Jenis_Kelamin_enc' in data:
+        jk = data['Jenis_Kelamin_enc']
+    elif 'jenis_kelamin' in data:
+        jk = str(data['jenis_kelamin']).strip().upper() == 'L'
+    else:
+        raise ValueError("kolom wajib tidak ada: jenis_kelamin")
+    hilang = [col for col in KOLOM_ANGKA if data.get(col) is None]
+    if hilang:
+        raise ValueError(f"kolom wajib tidak ada: {', '.join(hilang)}")
+    try:
+        vektor = (float(jk),) + tuple(float(data[col]) for col in KOLOM_ANGKA)
+    except (TypeError, ValueError):
+        raise ValueError("nilai, usia dan minat harus berupa angka")
+    # json.loads menerima NaN/Infinity; nilai seperti itu tidak bermakna bagi model
+    if not all(math.isfinite(v) for v in vektor):
+        raise ValueError("nilai, usia dan minat harus berupa angka berhingga")
+    return vektor
 
-    # Encode label; fallback '-' bila kosong
+@terukur('model.fit_mlp', lambda hasil, X, y_label: len(X))
+def latih_mlp(X, y_label):
+    """
+    Latih scaler + MLP dari matriks fitur X (urutan FTR) dan label teks y_label.
+    Mengembalikan (acc, label_encoder, mlp, scaler, X_scaled).
+    """
     label_encoder = LabelEncoder()
-    df['Potensi_enc'] = label_encoder.fit_transform(
-        df.get('potensi_asli', pd.Series(['-'] * len(df))).fillna('-')
-    )
-
-    X = df[FTR]
-    y = df['Potensi_enc']
+    y = label_encoder.fit_transform(y_label)
 
     scaler = StandardScaler()
     X_scaled = scaler.fit_transform(X)
 
     kelas_count = Counter(y)
     min_per_class = min(kelas_count.values()) if len(kelas_count) > 0 else 0
-    n_classes = y.nunique()
+    n_classes = len(kelas_count)
     n_samples = len(y)
     test_size = max(1, int(0.2 * n_samples))
 
@@ -75,29 +145,523 @@ def train_and_predict(df):
         mlp.fit(X_scaled, y)
         acc = 1.0  # semua data dipakai training, tidak bisa validasi
 
+    return acc, label_encoder, mlp, scaler, X_scaled
+
+def train_and_predict(df):
+    """Melatih model dan menghasilkan prediksi untuk seluruh data di df."""
+    df = preprocess_df(df)
+
+    # Encode label; fallback '-' bila kosong
+    y_label = df.get('potensi_asli', pd.Series(['-'] * len(df), index=df.index)).astype(object).fillna('-')
+    acc, label_encoder, mlp, scaler, X_scaled = latih_mlp(df[FTR].to_numpy(dtype=np.float32), y_label)
+    df['Potensi_enc'] = label_encoder.transform(y_label)
+
     prediksi = mlp.predict(X_scaled)
     prediksi_label = label_encoder.inverse_transform(prediksi)
     df['potensi_prediksi'] = prediksi_label
 
     return df, acc, label_encoder, mlp, scaler
 
-def single_predict(input_dict, mlp, scaler, label_encoder):
-    # Gunakan DataFrame agar nama fitur konsisten (hindari warning)
-    X_df = pd.DataFrame([{
-        "Jenis_Kelamin_enc": input_dict["Jenis_Kelamin_enc"],
-        "usia": input_dict["usia"],
-        "nilai_mtk": input_dict["nilai_mtk"],
-        "nilai_ipa": input_dict["nilai_ipa"],
-        "nilai_ips": input_dict["nilai_ips"],
-        "nilai_bindo": input_dict["nilai_bindo"],
-        "nilai_bing": input_dict["nilai_bing"],
-        "nilai_tik": input_dict["nilai_tik"],
-        "minat_sains": input_dict["minat_sains"],
-        "minat_bahasa": input_dict["minat_bahasa"],
-        "minat_sosial": input_dict["minat_sosial"],
-        "minat_teknologi": input_dict["minat_teknologi"],
-    }])[FTR]
-    X_scaled = scaler.transform(X_df)
-    pred = mlp.predict(X_scaled)
-    label = label_encoder.inverse_transform(pred)[0]
+def filter_berlabel(df):
+    """Baris dengan potensi_asli terisi (bukan kosong / '-')."""
+    if df.empty or 'potensi_asli' not in df.columns:
+        return pd.DataFrame()
+    return df[
+        df['potensi_asli'].notnull() &
+        (df['potensi_asli'] != "") &
+        (df['potensi_asli'] != "-")
+    ]
+
+def siapkan_data_latih():
+    """Ambil data berlabel dari DB; fallback ke contoh CSV bila DB belum berlabel."""
+    # Cek label lewat statistik (satu query agregat): tabel tidak perlu dimuat
+    # (apalagi ditahan di cache ambil_semua_data) hanya untuk tahu belum ada label
+    df_train = pd.DataFrame()
+    if statistik_data_latih()[0] > 0:
+        df_train = filter_berlabel(ambil_data_sejak(0))
+    if df_train.empty:
+        try:
+            df_train = pd.read_csv(SAMPLE_CSV)
+            if "Potensi" in df_train.columns:
+                df_train = df_train.rename(columns={"Potensi": "potensi_asli"})
+            df_train = filter_berlabel(df_train)
+        except Exception:
+            df_train = pd.DataFrame()
+    return df_train
+
+# Aktivasi hidden layer MLPClassifier versi NumPy (in-place, float64)
+def _relu(z):
+    return np.maximum(z, 0, out=z)
+
+def _tanh(z):
+    return np.tanh(z, out=z)
+
+def _logistic(z):
+    np.exp(-z, out=z)
+    z += 1.0
+    return np.reciprocal(z, out=z)
+
+def _identity(z):
+    return z
+
+_AKTIVASI = {'relu': _relu, 'tanh': _tanh, 'logistic': _logistic, 'identity': _identity}
+
+class InferenceEngine:
+    """
+    Forward pass MLP hasil training dalam NumPy murni: parameter scaler,
+    coefs_/intercepts_ dan label kelas disalin ke array float64 kontigu.
+    Semua hitungan float64 seperti sklearn, sehingga prediksi identik dengan
+    scaler.transform -> mlp.predict -> inverse_transform (float32 membuat
+    sebagian kecil input di dekat batas kelas berbeda label).
+    """
+
+    def __init__(self, mlp, scaler, label_encoder):
+        self.mean = np.ascontiguousarray(scaler.mean_, dtype=np.float64)
+        self.scale = np.ascontiguousarray(scaler.scale_, dtype=np.float64)
+        self.coefs = [np.ascontiguousarray(w, dtype=np.float64) for w in mlp.coefs_]
+        self.intercepts = [np.ascontiguousarray(b, dtype=np.float64) for b in mlp.intercepts_]
+        self.activation = _AKTIVASI[mlp.activation]
+        self.labels = np.asarray(label_encoder.inverse_transform(mlp.classes_), dtype=object)
+
+    def forward(self, X):
+        """Nilai output layer (sebelum softmax/logistic) untuk matriks fitur X (urutan FTR)."""
+        z = np.array(X, dtype=np.float64, ndmin=2)
+        z -= self.mean
+        z /= self.scale
+        n_layer = len(self.coefs)
+        for i in range(n_layer):
+            z = z @ self.coefs[i]
+            z += self.intercepts[i]
+            if i < n_layer - 1:
+                z = self.activation(z)
+        return z
+
+    def predict_index(self, X):
+        out = self.forward(X)
+        if out.shape[1] == 1:
+            # Model satu kelas (dilatih dari satu label): selalu kelas itu, seperti LabelBinarizer
+            if len(self.labels) == 1:
+                return np.zeros(len(out), dtype=np.intp)
+            # Biner: 1 unit logistic, kelas 1 bila p > 0.5 (expit yang sama dengan sklearn)
+            return (expit(out[:, 0]) > 0.5).astype(np.intp)
+        # Multikelas: argmax softmax = argmax z
+        return out.argmax(axis=1)
+
+    def predict(self, X):
+        """Label potensi untuk setiap baris X."""
+        return self.labels[self.predict_index(X)]
+
+def _siapkan_engine(bundle):
+    if bundle is not None and 'engine' not in bundle:
+        bundle['engine'] = InferenceEngine(bundle['mlp'], bundle['scaler'], bundle['label_encoder'])
+    return bundle
+
+def _fingerprint(stat):
+    # sama dengan db_utils.fingerprint_data(): jumlah-max_id-max_waktu-generasi
+    return "-".join(str(v) for v in stat)
+
+def _model_path(fingerprint):
+    key = hashlib.sha1(str(fingerprint).encode()).hexdigest()[:16]
+    return os.path.join(MODEL_FOLDER, f"model_{key}.pkl")
+
+def simpan_model(bundle):
+    """Simpan bundle model (mlp, scaler, label_encoder, ...) ke registry disk."""
+    if not os.path.exists(MODEL_FOLDER):
+        os.makedirs(MODEL_FOLDER)
+    path = _model_path(bundle['fingerprint'])
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+    # Buang model lama, sisakan MODEL_KEEP terbaru
+    for old in _file_model()[MODEL_KEEP:]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+    return path
+
+def muat_model(fingerprint):
+    """Muat bundle model untuk fingerprint tertentu; None bila belum ada."""
+    aktif = _MODEL_AKTIF
+    if aktif is not None and aktif['fingerprint'] == fingerprint:
+        return aktif
+    bundle = _baca_model(_model_path(fingerprint))
+    if bundle is None or bundle.get('fingerprint') != fingerprint:
+        return None
+    _pasang_model(bundle)
+    return bundle
+
+def _pasang_model(bundle):
+    global _MODEL_AKTIF
+    _MODEL_AKTIF = bundle
+
+def _baca_model(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return _siapkan_engine(pickle.load(f))
+    except Exception:
+        return None
+
+def _file_model():
+    """Path file model di registry, terbaru dulu."""
+    if not os.path.exists(MODEL_FOLDER):
+        return []
+    return sorted(
+        (os.path.join(MODEL_FOLDER, f) for f in os.listdir(MODEL_FOLDER)
+         if f.startswith("model_") and f.endswith(".pkl")),
+        key=os.path.getmtime, reverse=True
+    )
+
+def versi_model_terbaru():
+    """(path, mtime) file model terbaru di registry, untuk mendeteksi model baru; None bila kosong."""
+    files = _file_model()
+    return (files[0], os.path.getmtime(files[0])) if files else None
+
+def muat_model_terbaru(dari_disk=False):
+    """
+    Bundle model paling baru (model aktif di memori, lalu file terbaru di registry).
+    Bundle yang dibaca dari registry dipasang sebagai model aktif agar tidak
+    di-unpickle ulang (dan cache prediksinya tetap hidup) di pemanggilan berikutnya.
+    dari_disk=True melewati model di memori tanpa memasang, untuk proses lain
+    yang memantau registry.
+    """
+    if _MODEL_AKTIF is not None and not dari_disk:
+        return _MODEL_AKTIF
+    for path in _file_model():
+        bundle = _baca_model(path)
+        if bundle is not None:
+            if not dari_disk:
+                _pasang_model(bundle)
+            return bundle
+    return None
+
+def riwayat_model():
+    """Ringkasan model di registry (terbaru dulu): strategi, ukuran sampel, akurasi, waktu fit."""
+    files = _file_model()
+    if not files:
+        return pd.DataFrame()
+    baris = []
+    for path in files:
+        bundle = _baca_model(path)
+        if bundle is None:
+            continue
+        baris.append({
+            'waktu_latih': bundle.get('waktu_latih'),
+            'mode_latih': bundle.get('mode_latih'),
+            'strategi_latih': bundle.get('strategi_latih', 'semua'),
+            'n_sampel': bundle.get('n_sampel', bundle.get('n_train')),
+            'n_train': bundle.get('n_train'),
+            'acc': bundle.get('acc'),
+            'detik_latih': bundle.get('detik_latih'),
+        })
+    return pd.DataFrame(baris)
+
+def _daftarkan(bundle):
+    bundle.pop('engine', None)
+    _siapkan_engine(bundle)
+    simpan_model(bundle)
+    _pasang_model(bundle)
+    return bundle
+
+def awal_jendela(tahun=LATIH_JENDELA_TAHUN, sekarang=None):
+    """Awal tahun ajaran ke-`tahun` terakhir (termasuk tahun ajaran berjalan)."""
+    return datetime(tahun_ajaran(sekarang) - (tahun - 1), BULAN_AWAL_TAHUN_AJARAN, 1)
+
+def pilih_sampel_latih(kolom, meta, strategi=None):
+    """
+    Posisi baris (urut naik) dari snapshot feature store untuk latih penuh.
+    kolom: dict memmap dari feature_store.muat_kolom (y = kode label, waktu = epoch detik).
+    Mengembalikan (posisi, strategi yang dipakai); None sebagai posisi berarti semua baris.
+    """
+    strategi = strategi or LATIH_STRATEGI
+    if strategi not in STRATEGI_LATIH:
+        raise ValueError(f"Strategi latih tidak dikenal: {strategi} (pilihan: {', '.join(STRATEGI_LATIH)})")
+    n = meta['n']
+    if strategi == 'stratified':
+        rng = np.random.default_rng(LATIH_SEED)
+        y = np.asarray(kolom['y'])
+        bagian = []
+        for kelas in np.unique(y):
+            posisi = np.flatnonzero(y == kelas)
+            if len(posisi) > LATIH_MAKS_PER_KELAS:
+                posisi = rng.choice(posisi, LATIH_MAKS_PER_KELAS, replace=False)
+            bagian.append(posisi)
+        posisi = np.sort(np.concatenate(bagian)) if bagian else np.zeros(0, dtype=np.int64)
+    elif strategi == 'jendela':
+        batas = np.datetime64(awal_jendela(), 's').astype(np.int64)
+        posisi = np.flatnonzero(np.asarray(kolom['waktu']) >= batas)
+    elif strategi == 'reservoir':
+        from utils.feature_store import muat_reservoir
+        posisi = muat_reservoir(meta, kolom['y'])
+    else:
+        return None, 'semua'
+    # jendela kosong -> latih dengan seluruh data; sampel = semua baris -> tanpa salinan
+    if len(posisi) == 0:
+        return None, 'semua'
+    if len(posisi) == n:
+        return None, strategi
+    return posisi, strategi
+
+@terukur('model.latih_penuh', lambda hasil, *a, **k: hasil['n_sampel'] if hasil else 0)
+def latih_model(stat=None, strategi=None):
+    """
+    Latih ulang model penuh lalu simpan ke registry. Matriks fitur dibaca dari
+    snapshot kolumnar (feature store) dan dipilih sesuai strategi (LATIH_STRATEGI);
+    contoh CSV dipakai bila DB belum berlabel.
+    """
+    # import lokal: feature_store memakai preprocess_df/FTR dari modul ini
+    from utils.feature_store import muat_kolom
+
+    if stat is None:
+        stat = statistik_data_latih()
+    kolom, meta = muat_kolom()
+    if meta['n'] > 0:
+        posisi, strategi = pilih_sampel_latih(kolom, meta, strategi)
+        X, y = kolom['X'], kolom['y']
+        if posisi is not None:
+            X, y = X[posisi], y[posisi]   # hanya baris sampel yang disalin dari memmap
+        y_label = np.asarray(meta['labels'], dtype=object)[y]
+        sumber_latih, n_train, last_id = 'db', meta['n'], meta['last_id']
+    else:
+        df_train = preprocess_df(siapkan_data_latih())
+        if df_train.empty:
+            return None
+        X = df_train[FTR].to_numpy(dtype=np.float32)
+        y_label = df_train['potensi_asli'].to_numpy()
+        sumber_latih, n_train, last_id, strategi = 'csv', len(df_train), 0, 'semua'
+    mulai = time.perf_counter()
+    acc, label_encoder, mlp, scaler, _ = latih_mlp(X, y_label)
+    bundle = {
+        'fingerprint': _fingerprint(stat),
+        'mlp': mlp,
+        'scaler': scaler,
+        'label_encoder': label_encoder,
+        'acc': acc,
+        'n_train': n_train,
+        'last_id': last_id,
+        'sumber_latih': sumber_latih,
+        'mode_latih': 'penuh',
+        'n_update': 0,
+        'generasi': stat[3],
+        'strategi_latih': strategi,
+        'n_sampel': len(X),
+        'detik_latih': round(time.perf_counter() - mulai, 3),
+        'waktu_latih': datetime.now().isoformat(timespec='seconds'),
+    }
+    return _daftarkan(bundle)
+
+@terukur('model.latih_inkremental', lambda hasil, *a, **k: hasil['n_train'] if hasil else None)
+def update_model_inkremental(bundle, stat=None):
+    """
+    Perbarui model hanya dengan baris berlabel baru (id > last_id) memakai
+    StandardScaler.partial_fit dan MLPClassifier.partial_fit.
+    Mengembalikan None bila kondisi mengharuskan latih penuh.
+    """
+    if stat is None:
+        stat = statistik_data_latih()
+    jumlah = stat[0]
+    if bundle is None or bundle.get('sumber_latih') != 'db':
+        return None
+    if bundle.get('n_update', 0) >= FULL_RETRAIN_EVERY:
+        return None
+    # Generasi berubah: ada baris terhapus / label lama diubah sejak model dilatih
+    if bundle.get('generasi') != stat[3]:
+        return None
+
+    df_new = filter_berlabel(ambil_data_sejak(bundle['last_id']))
+    # Ada baris terhapus / diubah -> data lama tidak lagi valid
+    if df_new.empty or jumlah != bundle['n_train'] + len(df_new):
+        return None
+    if len(df_new) > FULL_RETRAIN_RATIO * bundle['n_train']:
+        return None
+    # Kelas potensi baru tidak bisa ditambahkan ke layer output -> latih penuh
+    if not set(df_new['potensi_asli']).issubset(set(bundle['label_encoder'].classes_)):
+        return None
+
+    mulai = time.perf_counter()
+    baru = copy.deepcopy(bundle)
+    df_new = preprocess_df(df_new)
+    X_new = df_new[FTR].to_numpy(dtype=np.float32)
+    y_new = baru['label_encoder'].transform(df_new['potensi_asli'])
+    baru['scaler'].partial_fit(X_new)
+    X_scaled = baru['scaler'].transform(X_new)
+    for _ in range(INCREMENTAL_EPOCHS):
+        baru['mlp'].partial_fit(X_scaled, y_new)
+
+    baru.update({
+        'fingerprint': _fingerprint(stat),
+        'n_train': jumlah,
+        'last_id': int(df_new['id'].max()),
+        'mode_latih': 'inkremental',
+        'n_update': bundle.get('n_update', 0) + 1,
+        'n_sampel': bundle.get('n_sampel', bundle['n_train']) + len(df_new),
+        'detik_latih': round(time.perf_counter() - mulai, 3),
+        'waktu_latih': datetime.now().isoformat(timespec='seconds'),
+    })
+    return _daftarkan(baru)
+
+def get_model(on_progress=None):
+    """
+    Model untuk data saat ini: pakai cache/registry; bila fingerprint berubah
+    coba update inkremental dulu, latih penuh bila tidak memungkinkan.
+    on_progress(fraksi, pesan) dipanggil di setiap tahap (untuk worker latar).
+    """
+    def lapor(fraksi, pesan):
+        if on_progress is not None:
+            on_progress(fraksi, pesan)
+
+    lapor(0.05, "Memeriksa data latih")
+    stat = statistik_data_latih()
+    bundle = muat_model(_fingerprint(stat))
+    if bundle is not None:
+        return bundle
+    with _LATIH_LOCK:
+        # Bisa jadi sudah dilatih thread lain selama menunggu lock
+        stat = statistik_data_latih()
+        bundle = muat_model(_fingerprint(stat))
+        if bundle is None:
+            lapor(0.2, "Update model inkremental")
+            bundle = update_model_inkremental(muat_model_terbaru(), stat)
+        if bundle is None:
+            lapor(0.3, "Melatih ulang model penuh")
+            bundle = latih_model(stat)
+    lapor(1.0, "Selesai")
+    return bundle
+
+# Cache prediksi LRU: kunci = byte vektor FTR (float64), berlaku untuk satu
+# versi model. Versi = objek InferenceEngine, yang dibuat baru setiap latih
+# penuh/inkremental atau muat ulang, jadi cache otomatis kosong saat model berganti.
+_PREDIKSI_CACHE = OrderedDict()
+_PREDIKSI_ENGINE = None
+_PREDIKSI_HITUNG = {'hit': 0, 'miss': 0, 'duplikat_batch': 0}
+_PREDIKSI_LOCK = threading.Lock()
+
+def _cache_untuk(engine):
+    # dipanggil dengan _PREDIKSI_LOCK dipegang
+    global _PREDIKSI_ENGINE
+    if _PREDIKSI_ENGINE is not engine:
+        _PREDIKSI_CACHE.clear()
+        _PREDIKSI_ENGINE = engine
+    return _PREDIKSI_CACHE
+
+def prediksi_matriks(X, model):
+    """
+    Label potensi untuk matriks fitur X (urutan FTR). Baris kembar di dalam X
+    dan baris yang sudah ada di cache tidak dihitung ulang; sisanya diprediksi
+    dalam satu panggilan vektor.
+    """
+    engine = _siapkan_engine(model)['engine']
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    if len(X) == 0:
+        return engine.predict(X)
+    kunci = X.view(np.dtype((np.void, X.shape[1] * X.itemsize))).ravel().tolist()
+    kode, unik = pd.factorize(np.array(kunci, dtype=object))
+    # posisi kemunculan pertama tiap baris unik
+    pertama = np.empty(len(unik), dtype=np.intp)
+    pertama[kode[::-1]] = np.arange(len(kode) - 1, -1, -1)
+
+    hasil = np.empty(len(unik), dtype=object)
+    with _PREDIKSI_LOCK:
+        cache = _cache_untuk(engine)
+        kurang = []
+        for i, k in enumerate(unik):
+            label = cache.get(k)
+            if label is None:
+                kurang.append(i)
+            else:
+                cache.move_to_end(k)
+                hasil[i] = label
+        _PREDIKSI_HITUNG['hit'] += len(unik) - len(kurang)
+        _PREDIKSI_HITUNG['miss'] += len(kurang)
+        _PREDIKSI_HITUNG['duplikat_batch'] += len(kode) - len(unik)
+    if kurang:
+        kurang = np.asarray(kurang, dtype=np.intp)
+        hasil[kurang] = engine.predict(X[pertama[kurang]])
+        with _PREDIKSI_LOCK:
+            cache = _cache_untuk(engine)
+            for i in kurang:
+                cache[unik[i]] = hasil[i]
+            while len(cache) > PREDIKSI_CACHE_MAKS:
+                cache.popitem(last=False)
+    return hasil[kode]
+
+def info_cache_prediksi():
+    """Penghitung cache prediksi: hit, miss, duplikat_batch, rasio_hit, ukuran, maks."""
+    with _PREDIKSI_LOCK:
+        info = dict(_PREDIKSI_HITUNG, ukuran=len(_PREDIKSI_CACHE), maks=PREDIKSI_CACHE_MAKS)
+    total = info['hit'] + info['miss'] + info['duplikat_batch']
+    info['rasio_hit'] = (info['hit'] + info['duplikat_batch']) / total if total else None
+    return info
+
+def reset_cache_prediksi():
+    """Kosongkan cache prediksi beserta penghitungnya."""
+    global _PREDIKSI_ENGINE
+    with _PREDIKSI_LOCK:
+        _PREDIKSI_CACHE.clear()
+        _PREDIKSI_ENGINE = None
+        for k in _PREDIKSI_HITUNG:
+            _PREDIKSI_HITUNG[k] = 0
+
+@terukur('model.prediksi_batch', lambda hasil, df, model: len(df))
+def prediksi_df(df, model):
+    """Prediksi label potensi untuk seluruh baris df (sudah melalui preprocess_df)."""
+    return prediksi_matriks(df[FTR].to_numpy(dtype=np.float64), model)
+
+@terukur('model.prediksi_satu')
+def single_predict(input_dict, model=None):
+    """Prediksi potensi satu siswa; tanpa model eksplisit dipakai model dari registry."""
+    if model is None:
+        model = get_model()
+        if model is None:
+            return None
+    x = np.array([[input_dict[f] for f in FTR]], dtype=np.float64)
+    engine = _siapkan_engine(model)['engine']
+    kunci = x.tobytes()
+    with _PREDIKSI_LOCK:
+        cache = _cache_untuk(engine)
+        label = cache.get(kunci)
+        if label is not None:
+            cache.move_to_end(kunci)
+            _PREDIKSI_HITUNG['hit'] += 1
+            return label
+        _PREDIKSI_HITUNG['miss'] += 1
+    label = engine.predict(x)[0]
+    with _PREDIKSI_LOCK:
+        cache = _cache_untuk(engine)
+        cache[kunci] = label
+        if len(cache) > PREDIKSI_CACHE_MAKS:
+            cache.popitem(last=False)
     return label
+
+def evaluasi_dari_confusion(df_conf):
+    """
+    Akurasi & classification report (precision, recall, f1-score, support) dari
+    tabel hitungan (potensi_asli, potensi_prediksi, jumlah); biaya O(kelas^2).
+    """
+    if df_conf is None or df_conf.empty:
+        return None, pd.DataFrame(columns=['precision', 'recall', 'f1-score', 'support'])
+    cm = df_conf.pivot_table(
+        index='potensi_asli', columns='potensi_prediksi', values='jumlah',
+        aggfunc='sum', fill_value=0
+    )
+    labels = sorted(set(cm.index) | set(cm.columns))
+    cm = cm.reindex(index=labels, columns=labels, fill_value=0).to_numpy(dtype=float)
+
+    benar = np.diag(cm)
+    support = cm.sum(axis=1)
+    total_pred = cm.sum(axis=0)
+    total = cm.sum()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(total_pred > 0, benar / total_pred, 0.0)
+        recall = np.where(support > 0, benar / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    acc = float(benar.sum() / total) if total > 0 else None
+
+    report = pd.DataFrame({
+        'precision': precision, 'recall': recall, 'f1-score': f1, 'support': support
+    }, index=labels)
+    return acc, report
@@ -1,31 +1,63 @@
 from fpdf import FPDF
+import numpy as np
 import pandas as pd
 import os
 import re
+import zipfile
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
+from utils.perf_utils import terukur
+from utils.kolom_utils import map_columns
+try:
+    from PIL import Image   # terpasang bersama matplotlib
+except ImportError:
+    Image = None
 
-COLUMN_MAP = {
-    'nama': 'Nama',
-    'jenis_kelamin': 'JK',
-    'usia': 'Usia',
-    'nilai_mtk': 'Matematika',
-    'nilai_ipa': 'IPA',
-    'nilai_ips': 'IPS',
-    'nilai_bindo': 'Bahasa Indonesia',
-    'nilai_bing': 'Bahasa Inggris',
-    'nilai_tik': 'TIK',
-    'minat_sains': 'Minat Sains',
-    'minat_bahasa': 'Minat Bahasa',
-    'minat_sosial': 'Minat Sosial',
-    'minat_teknologi': 'Minat Teknologi',
-    'potensi_asli': 'Potensi Asli',
-    'potensi_prediksi': 'Potensi Prediksi'
-}
-
-def map_columns(df, colmap=COLUMN_MAP):
-    return df.rename(columns={k: v for k, v in colmap.items() if k in df.columns})
+LOGO_KIRI = 'logo/logo-bekasi.png'
+LOGO_KANAN = 'logo/logo-smp.png'
+LOGO_PX = 200           # sisi terpanjang logo di PDF (22 mm ~ 230 dpi); PNG asli 1024 px ~1,7 MB
+MAX_CELL_CHARS = 22     # teks lebih panjang dipotong menjadi 20 karakter + "..."
+
+ZIP_WORKERS = min(4, os.cpu_count() or 1)   # proses paralel untuk laporan per siswa
+
+# Cache lintas dokumen: hasil parse PNG logo & tabel lebar karakter per font
+_LOGO_CACHE = {}
+_FONT_METRIK = {}
+
+def _parse_logo(pdf, path):
+    """Info gambar fpdf untuk logo, diperkecil dulu ke LOGO_PX (sekali per proses)."""
+    if not os.path.exists(path):
+        return None
+    if Image is None:
+        return pdf._parsepng(path)
+    # fpdf 1.7 hanya mem-parse PNG dari file: hasil resize ditulis ke file sementara
+    fd, tmp_path = tempfile.mkstemp(suffix=".png")
+    try:
+        with os.fdopen(fd, "wb") as f, Image.open(path) as im:
+            im.thumbnail((LOGO_PX, LOGO_PX), Image.LANCZOS)
+            im.save(f, format="PNG", optimize=True)
+        return pdf._parsepng(tmp_path)
+    finally:
+        os.remove(tmp_path)
 
 class PDFWithHeader(FPDF):
+    def _logo(self, path, x, y, w):
+        # PNG logo di-parse sekali per proses, bukan dibaca ulang tiap dokumen/halaman
+        if path not in self.images:
+            if path not in _LOGO_CACHE:
+                _LOGO_CACHE[path] = _parse_logo(self, path)
+            info = _LOGO_CACHE[path]
+            if info is None:
+                return
+            # salinan dangkal: fpdf menghapus 'data' dari info setelah output
+            self.images[path] = dict(info, i=len(self.images) + 1)
+            # PNG dengan kanal alpha (smask) butuh PDF 1.4, seperti saat _parsepng
+            if 'smask' in info and self.pdf_version < '1.4':
+                self.pdf_version = '1.4'
+        self.image(path, x=x, y=y, w=w)
+
     def header(self):
         # Gunakan margin konsisten untuk semua konten header
         margin = 12                # kiri/kanan
@@ -34,10 +66,8 @@ class PDFWithHeader(FPDF):
 
         # Logo kiri & kanan diposisikan SIMETRIS
         try:
-            if os.path.exists('logo/logo-bekasi.png'):
-                self.image('logo/logo-bekasi.png', x=margin, y=8, w=22)
-            if os.path.exists('logo/logo-smp.png'):
-                self.image('logo/logo-smp.png', x=page_w - margin - 22, y=8, w=22)
+            self._logo(LOGO_KIRI, x=margin, y=8, w=22)
+            self._logo(LOGO_KANAN, x=page_w - margin - 22, y=8, w=22)
         except Exception:
             pass
 
@@ -68,7 +98,82 @@ def _slugify(text):
     text = text.strip().replace(' ', '_')
     return re.sub(r'_{2,}', '_', text)
 
+def _metrik_font(pdf):
+    """Tabel lebar 256 karakter (satuan 1/1000 em) untuk font aktif, di-cache per font."""
+    nama = pdf.current_font['name']
+    if nama not in _FONT_METRIK:
+        tabel = np.zeros(256, dtype=np.float64)
+        for ch, lebar in pdf.current_font['cw'].items():
+            kode = ord(ch) if isinstance(ch, str) else int(ch)
+            if kode < 256:
+                tabel[kode] = lebar
+        _FONT_METRIK[nama] = tabel
+    return _FONT_METRIK[nama]
+
+def pemanasan_pdf():
+    """Isi cache logo (PNG) & metrik font Arial lebih awal, misalnya saat server mulai."""
+    pdf = PDFWithHeader(orientation="L", unit="mm", format="A4")
+    pdf.add_page()      # header mem-parse kedua logo
+    for gaya in ("", "B"):
+        pdf.set_font("Arial", gaya, 10)
+        _metrik_font(pdf)
+
+def _lebar_maks(pdf, values):
+    """Lebar (mm) teks terlebar di antara values pada font aktif, tanpa loop per sel."""
+    uniq = [v for v in pd.unique(np.asarray(values, dtype=object)) if v]
+    if not uniq:
+        return 0.0
+    panjang = np.fromiter((len(v) for v in uniq), dtype=np.intp, count=len(uniq))
+    kode = np.frombuffer(''.join(uniq).encode('latin-1', errors='replace'), dtype=np.uint8)
+    awal = np.concatenate(([0], np.cumsum(panjang)[:-1]))
+    lebar = np.add.reduceat(_metrik_font(pdf)[kode], awal)
+    return float(lebar.max()) * pdf.font_size / 1000.0
+
+def _tulis_tabel(pdf, df, lebar_min):
+    """Header biru + baris data; lebar kolom dari teks terlebar, diskalakan ke 272 mm."""
+    teks = {col: df[col].astype(str) for col in df.columns}
+
+    pdf.set_font("Arial", "B", 10)
+    pdf.set_fill_color(25, 118, 210)
+    pdf.set_text_color(255, 255, 255)
+    col_widths = [
+        max(pdf.get_string_width(str(col)) + 6, lebar_min, _lebar_maks(pdf, teks[col]) + 6)
+        for col in df.columns
+    ]
+    total_width = sum(col_widths)
+    if total_width > 272:
+        scale = 272.0 / total_width
+        col_widths = [w * scale for w in col_widths]
+    for w, col in zip(col_widths, df.columns):
+        pdf.cell(w, 8, str(col), border=1, align='C', fill=True)
+    if len(df.columns) > 0:
+        pdf.ln()
+
+    pdf.set_font("Arial", "", 9)
+    pdf.set_text_color(0, 0, 0)
+    kolom = [
+        ser.where(ser.str.len() <= MAX_CELL_CHARS, ser.str[:MAX_CELL_CHARS - 2] + "...").tolist()
+        for ser in teks.values()
+    ]
+    for row in zip(*kolom):
+        for w, val in zip(col_widths, row):
+            pdf.cell(w, 8, val, border=1, align='C')
+        pdf.ln()
+
+def _pdf_bytes(pdf):
+    out = pdf.output(dest='S')
+    # fpdf 1.7 mengembalikan str latin-1; fpdf2 mengembalikan bytearray
+    return out.encode('latin-1') if isinstance(out, str) else bytes(out)
+
+def nama_file_laporan(title):
+    """Nama file unik untuk unduhan laporan: <judul>_<timestamp>.pdf"""
+    slug = _slugify(title) or "laporan"
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{slug}_{timestamp}.pdf"
+
+@terukur('pdf.laporan', lambda hasil, df, *a, **k: len(df))
 def generate_pdf_report(df, title, kepala_sekolah="Dra.Watimah,M.M.Pd", nip="196612311995012001"):
+    """Buat laporan PDF tabel siswa; mengembalikan isi PDF sebagai bytes (tanpa file di disk)."""
     # Pastikan kolom sudah dimapping
     df = map_columns(df)
     pdf = PDFWithHeader(orientation="L", unit="mm", format="A4")
@@ -95,61 +200,11 @@ def generate_pdf_report(df, title, kepala_sekolah="Dra.Watimah,M.M.Pd", nip="196
     df2 = df[[col for col in kolom_bawah if col in df.columns]]
 
     # Tabel 1
-    pdf.set_font("Arial", "B", 10)
-    pdf.set_fill_color(25, 118, 210)
-    pdf.set_text_color(255, 255, 255)
-    col_widths1 = []
-    for col in df1.columns:
-        lebar = max(pdf.get_string_width(str(col)) + 6, 28)
-        for isi in df1[col]:
-            lebar = max(lebar, pdf.get_string_width(str(isi)) + 6)
-        col_widths1.append(lebar)
-    total_width1 = sum(col_widths1) if col_widths1 else 0
-    if total_width1 > 272 and total_width1 > 0:
-        scale = 272.0 / total_width1
-        col_widths1 = [w * scale for w in col_widths1]
-    for i, col in enumerate(df1.columns):
-        pdf.cell(col_widths1[i], 8, str(col), border=1, align='C', fill=True)
-    if len(df1.columns) > 0:
-        pdf.ln()
-    pdf.set_font("Arial", "", 9)
-    pdf.set_text_color(0, 0, 0)
-    for _, row in df1.iterrows():
-        for i, col in enumerate(df1.columns):
-            val = str(row[col])
-            if len(val) > 22:
-                val = val[:20] + "..."
-            pdf.cell(col_widths1[i], 8, val, border=1, align='C')
-        pdf.ln()
+    _tulis_tabel(pdf, df1, lebar_min=28)
 
     # Tabel 2
     pdf.ln(3)
-    pdf.set_font("Arial", "B", 10)
-    pdf.set_fill_color(25, 118, 210)
-    pdf.set_text_color(255, 255, 255)
-    col_widths2 = []
-    for col in df2.columns:
-        lebar = max(pdf.get_string_width(str(col)) + 6, 32)
-        for isi in df2[col]:
-            lebar = max(lebar, pdf.get_string_width(str(isi)) + 6)
-        col_widths2.append(lebar)
-    total_width2 = sum(col_widths2) if col_widths2 else 0
-    if total_width2 > 272 and total_width2 > 0:
-        scale = 272.0 / total_width2
-        col_widths2 = [w * scale for w in col_widths2]
-    for i, col in enumerate(df2.columns):
-        pdf.cell(col_widths2[i], 8, str(col), border=1, align='C', fill=True)
-    if len(df2.columns) > 0:
-        pdf.ln()
-    pdf.set_font("Arial", "", 9)
-    pdf.set_text_color(0, 0, 0)
-    for _, row in df2.iterrows():
-        for i, col in enumerate(df2.columns):
-            val = str(row[col])
-            if len(val) > 22:
-                val = val[:20] + "..."
-            pdf.cell(col_widths2[i], 8, val, border=1, align='C')
-        pdf.ln()
+    _tulis_tabel(pdf, df2, lebar_min=32)
 
     # Footer tanda tangan
     pdf.ln(10)
@@ -157,7 +212,7 @@ def generate_pdf_report(df, title, kepala_sekolah="Dra.Watimah,M.M.Pd", nip="196
     pdf.set_font("Arial", size=11)
     pdf.cell(70, 6, f"Bekasi, {pd.Timestamp.now().strftime('%d %B %Y')}", ln=True, align="L")
     pdf.set_x(220)
-    pdf.cell(70, 6, f"Kepala SMP Negeri 6 Bekasi,", ln=True, align="L")
+    pdf.cell(70, 6, "Kepala SMP Negeri 6 Bekasi,", ln=True, align="L")
     pdf.ln(14)
     pdf.set_x(220)
     pdf.set_font("Arial", "BU", 11)
@@ -166,10 +221,57 @@ def generate_pdf_report(df, title, kepala_sekolah="Dra.Watimah,M.M.Pd", nip="196
     pdf.set_font("Arial", size=11)
     pdf.cell(70, 6, f"NIP: {nip}", ln=True, align="L")
 
-    # Nama file unik
-    slug = _slugify(title) or "laporan"
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = f"{slug}_{timestamp}.pdf"
-    pdf.output(output_file)
-    return output_file
+    return _pdf_bytes(pdf)
+
+def _render_laporan_siswa(tugas):
+    # Dijalankan di proses worker: satu siswa -> (nama file, isi PDF)
+    urutan, baris = tugas
+    nama = baris.get('Nama', baris.get('nama', '-'))
+    judul = f"Laporan Prediksi Siswa - {nama}"
+    nama_file = f"{urutan:04d}_{_slugify(nama) or 'siswa'}.pdf"
+    return nama_file, generate_pdf_report(pd.DataFrame([baris]), judul)
+
+@terukur('pdf.zip_per_siswa', lambda hasil, *a, **k: hasil)
+def generate_zip_laporan_siswa(df, output, max_workers=ZIP_WORKERS, on_progress=None):
+    """
+    Laporan PDF per siswa (PDFWithHeader) untuk setiap baris df, dirender paralel
+    di process pool dan langsung ditulis ke ZIP `output` (path atau file object)
+    begitu selesai. Jumlah PDF yang ditahan di memori dibatasi ~2x jumlah worker.
+    Mengembalikan jumlah laporan.
+    """
+    df = map_columns(df)
+    total = len(df)
+    tugas = enumerate((dict(zip(df.columns, row)) for row in df.itertuples(index=False, name=None)), start=1)
+    selesai = 0
+    # PDF sudah terkompresi (logo PNG) -> ZIP_STORED, tanpa deflate ulang
+    with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_STORED) as zf:
+        if max_workers <= 1 or total <= 1:
+            for t in tugas:
+                nama_file, isi = _render_laporan_siswa(t)
+                zf.writestr(nama_file, isi)
+                selesai += 1
+                if on_progress is not None:
+                    on_progress(selesai, total)
+            return selesai
+
+        # 'spawn' aman dipakai dari proses yang memiliki banyak thread (Streamlit)
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx) as pool:
+            berjalan = set()
+            for t in tugas:
+                berjalan.add(pool.submit(_render_laporan_siswa, t))
+                if len(berjalan) < 2 * max_workers:
+                    continue
+                beres, berjalan = wait(berjalan, return_when=FIRST_COMPLETED)
+                for fut in beres:
+                    zf.writestr(*fut.result())
+                    selesai += 1
+                    if on_progress is not None:
+                        on_progress(selesai, total)
+            for fut in berjalan:
+                zf.writestr(*fut.result())
+                selesai += 1
+                if on_progress is not None:
+                    on_progress(selesai, total)
+    return selesai
 
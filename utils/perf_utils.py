@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+
+# Instrumentasi waktu per tahap (baca DB, preprocess, latih, simpan, PDF, ...).
+# Catatan disimpan di memori proses (rolling) dan, bila PERF_LOG diisi, juga
+# ditulis sebagai JSON per baris ke file log.
+PERF_RIWAYAT = 500                          # catatan terakhir per tahap
+PERF_LOG = os.environ.get('PERF_LOG')       # path file log JSON-lines (opsional)
+
+_CATATAN = {}       # tahap -> deque[(detik, n_baris, waktu)]
+_LOCK = threading.Lock()
+_LOG_LOCK = threading.Lock()
+
+def atur_log(path):
+    """Aktifkan (path) atau matikan (None) log terstruktur ke file."""
+    global PERF_LOG
+    PERF_LOG = path
+
+def catat(tahap, detik, n_baris=None, **info):
+    """Simpan satu pengukuran; ditulis juga ke PERF_LOG bila aktif."""
+    waktu = datetime.now()
+    with _LOCK:
+        if tahap not in _CATATAN:
+            _CATATAN[tahap] = deque(maxlen=PERF_RIWAYAT)
+        _CATATAN[tahap].append((detik, n_baris, waktu))
+    path = PERF_LOG
+    if path:
+        baris = {'waktu': waktu.isoformat(timespec='milliseconds'), 'tahap': tahap,
+                 'ms': round(detik * 1000, 3), 'n_baris': n_baris, **info}
+        try:
+            with _LOG_LOCK, open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(baris, default=str) + "\n")
+        except OSError:
+            pass    # log hanya pelengkap; kegagalan menulis tidak boleh mengganggu aplikasi
+
+@contextmanager
+def ukur_tahap(tahap, n_baris=None):
+    """
+    Context manager pengukur waktu. Jumlah baris boleh diisi belakangan:
+        with ukur_tahap("db.baca") as info:
+            df = ...
+            info['n_baris'] = len(df)
+    Waktu tetap dicatat bila blok berakhir dengan exception (ditandai gagal=True).
+    """
+    info = {'n_baris': n_baris}
+    mulai = time.perf_counter()
+    gagal = False
+    try:
+        yield info
+    except BaseException:
+        gagal = True
+        raise
+    finally:
+        tambahan = {'gagal': True} if gagal else {}
+        catat(tahap, time.perf_counter() - mulai, info.get('n_baris'), **tambahan)
+
+def terukur(tahap, n_baris=None):
+    """
+    Decorator ukur_tahap untuk satu fungsi. n_baris(hasil, *args, **kwargs)
+    opsional, menghitung jumlah baris dari hasil/argumen fungsi.
+    """
+    def dekorator(fungsi):
+        @wraps(fungsi)
+        def pembungkus(*args, **kwargs):
+            with ukur_tahap(tahap) as info:
+                hasil = fungsi(*args, **kwargs)
+                if n_baris is not None:
+                    try:
+                        info['n_baris'] = n_baris(hasil, *args, **kwargs)
+                    except Exception:
+                        pass
+                return hasil
+        return pembungkus
+    return dekorator
+
+def ringkasan_tahap():
+    """DataFrame per tahap: jumlah panggilan, p50/p95/maks (ms), rata-rata baris, terakhir."""
+    with _LOCK:
+        salinan = {tahap: list(isi) for tahap, isi in _CATATAN.items()}
+    hasil = []
+    for tahap, isi in sorted(salinan.items()):
+        ms = np.array([c[0] for c in isi]) * 1000
+        baris = [c[1] for c in isi if c[1] is not None]
+        hasil.append({
+            'tahap': tahap,
+            'jumlah': len(isi),
+            'p50_ms': round(float(np.percentile(ms, 50)), 2),
+            'p95_ms': round(float(np.percentile(ms, 95)), 2),
+            'maks_ms': round(float(ms.max()), 2),
+            'rata_baris': round(float(np.mean(baris)), 1) if baris else None,
+            'terakhir': isi[-1][2].strftime('%d/%m/%Y %H:%M:%S'),
+        })
+    return pd.DataFrame(hasil, columns=['tahap', 'jumlah', 'p50_ms', 'p95_ms', 'maks_ms', 'rata_baris', 'terakhir'])
+
+def reset_catatan():
+    with _LOCK:
+        _CATATAN.clear()
+
+def log_aktif():
+    """Path file log terstruktur yang sedang aktif, atau None."""
+    return PERF_LOG
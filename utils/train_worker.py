@@ -0,0 +1,115 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from utils.db_utils import fingerprint_data
+
+# utils.model_utils (sklearn) diimpor di dalam fungsi: status job bisa dibaca
+# halaman mana pun tanpa ikut memuat sklearn
+
+# Satu thread latar: job latih dijalankan berurutan, UI tidak ikut menunggu
+MAX_RIWAYAT_JOB = 20
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="latih-model")
+_JOBS = OrderedDict()       # job_id -> status job
+_FUTURES = {}               # job_id -> Future
+_JOBS_LOCK = threading.Lock()
+
+def _waktu():
+    return datetime.now().isoformat(timespec='seconds')
+
+def _update_job(job_id, **nilai):
+    with _JOBS_LOCK:
+        if job_id in _JOBS:
+            _JOBS[job_id].update(nilai)
+
+def _jalankan(job_id):
+    from utils.model_utils import get_model
+
+    _update_job(job_id, status='berjalan', mulai=_waktu())
+    try:
+        bundle = get_model(
+            on_progress=lambda fraksi, pesan: _update_job(job_id, progress=fraksi, pesan=pesan)
+        )
+    except Exception as e:
+        # Galat dicatat di status job (bukan dilempar ke Future) agar UI bisa menampilkannya
+        galat = f"{type(e).__name__}: {e}"
+        _update_job(job_id, status='gagal', pesan=galat, galat=galat, selesai=_waktu())
+        return None
+    _update_job(
+        job_id, status='selesai', progress=1.0, selesai=_waktu(),
+        pesan="Selesai" if bundle is not None else "Data latih tidak tersedia",
+        mode_latih=bundle.get('mode_latih') if bundle is not None else None,
+    )
+    return bundle
+
+def ajukan_latih():
+    """
+    Antrekan latih/update model untuk data saat ini. Mengembalikan job_id, atau
+    None bila model untuk data ini sudah ada. Job yang sama tidak diantrekan dua kali.
+    """
+    from utils.model_utils import muat_model
+
+    fingerprint = fingerprint_data()
+    if muat_model(fingerprint) is not None:
+        return None
+    with _JOBS_LOCK:
+        for job_id, job in reversed(_JOBS.items()):
+            if job['fingerprint'] == fingerprint and job['status'] in ('antri', 'berjalan'):
+                return job_id
+        job_id = uuid.uuid4().hex[:8]
+        _JOBS[job_id] = {
+            'job_id': job_id, 'fingerprint': fingerprint, 'status': 'antri',
+            'progress': 0.0, 'pesan': "Menunggu antrean", 'diajukan': _waktu(),
+            'mulai': None, 'selesai': None, 'mode_latih': None, 'galat': None,
+        }
+        while len(_JOBS) > MAX_RIWAYAT_JOB:
+            lama, _ = _JOBS.popitem(last=False)
+            _FUTURES.pop(lama, None)
+        _FUTURES[job_id] = _EXECUTOR.submit(_jalankan, job_id)
+    return job_id
+
+def status_job(job_id):
+    """Salinan status job (status, progress, pesan, waktu); None bila tidak dikenal."""
+    with _JOBS_LOCK:
+        job = _JOBS.get(job_id)
+        return dict(job) if job is not None else None
+
+def job_berjalan():
+    """Status job terakhir yang masih antri/berjalan, atau None."""
+    with _JOBS_LOCK:
+        for job in reversed(_JOBS.values()):
+            if job['status'] in ('antri', 'berjalan'):
+                return dict(job)
+    return None
+
+def tunggu_job(job_id, timeout=None):
+    """
+    Blokir sampai job selesai; mengembalikan (bundle model, galat). galat berisi
+    pesan kesalahan bila latih gagal (bundle None), selain itu None.
+    """
+    with _JOBS_LOCK:
+        future = _FUTURES.get(job_id)
+    if future is None:
+        from utils.model_utils import muat_model_terbaru
+        return muat_model_terbaru(), None
+    bundle = future.result(timeout=timeout)
+    job = status_job(job_id)
+    return bundle, (job['galat'] if job is not None else None)
+
+def model_untuk_prediksi():
+    """
+    (model, job_id) tanpa menunggu training: model untuk data terkini bila sudah
+    ada; kalau belum, latih diantrekan dan model terakhir yang selesai dipakai.
+    model None berarti belum pernah ada model sama sekali.
+    """
+    from utils.model_utils import muat_model, muat_model_terbaru
+
+    fingerprint = fingerprint_data()
+    bundle = muat_model(fingerprint)
+    if bundle is not None:
+        return bundle, None
+    job_id = ajukan_latih()
+    return muat_model_terbaru(), job_id